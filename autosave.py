@@ -0,0 +1,69 @@
+import json
+import threading
+import time
+
+from file_utils import atomic_write
+
+AUTOSAVE_INTERVAL = 2.0  # Seconds, at most one write per interval however fast changes come in
+
+
+class CoalescingWriter:
+    # Saves json on a background thread. Only the latest state submitted is kept, so a burst of changes becomes a
+    # single write, and each write goes through a temp file and rename so a crash can't leave a half written file
+    def __init__(self, path, interval=AUTOSAVE_INTERVAL, serialise=None):
+        self.path = path
+        self.interval = interval
+        self.serialise = serialise or (lambda data: json.dumps(data, indent=2))  # Indent used for readability of json
+        self.pending = None  # Latest state not written yet
+        self.writing = False
+        self.flushing = False  # Set by flush to skip the wait for the interval
+        self.stopped = False
+        self.last_write = 0.0
+        self.condition = threading.Condition()
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def submit(self, data):  # Called from the UI thread, data must not be changed afterwards as it is written later
+        with self.condition:
+            self.pending = data
+            self.condition.notify_all()
+
+    def run(self):
+        while True:
+            with self.condition:
+                while self.pending is None and not self.stopped:
+                    self.condition.wait()
+                if self.pending is None:
+                    return  # Stopped with nothing left to write
+
+                wait = self.last_write + self.interval - time.monotonic()
+                while wait > 0 and not (self.flushing or self.stopped):  # More changes may replace pending meanwhile
+                    self.condition.wait(wait)
+                    wait = self.last_write + self.interval - time.monotonic()
+
+                data, self.pending = self.pending, None
+                self.writing = True
+
+            try:
+                atomic_write(self.path, self.serialise(data))
+            except Exception as e:
+                print(f"Failed to save data: {e}")  # Used in event of any errors, then they will be printed
+
+            with self.condition:
+                self.writing = False
+                self.last_write = time.monotonic()
+                self.condition.notify_all()
+
+    def flush(self, timeout=5.0):  # Writes anything pending straight away and waits for it, e.g. when the app closes
+        with self.condition:
+            self.flushing = True
+            self.condition.notify_all()
+            self.condition.wait_for(lambda: self.pending is None and not self.writing, timeout)
+            self.flushing = False
+
+    def close(self):
+        self.flush()
+        with self.condition:
+            self.stopped = True
+            self.condition.notify_all()
+        self.thread.join(timeout=5.0)
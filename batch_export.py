@@ -0,0 +1,107 @@
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+
+from timetable_export import export_week, load_feed, week_dates_for
+
+
+def load_manifest(path):  # Jobs as dicts with "source", "week" and "output", from a .json list or a .csv with a header row
+    with open(path, newline="") as file:
+        if path.lower().endswith(".json"):
+            jobs = json.load(file)
+        else:
+            jobs = list(csv.DictReader(file))
+
+    for number, job in enumerate(jobs, start=1):
+        missing = [field for field in ("source", "week", "output") if not job.get(field)]
+        if missing:
+            raise ValueError(f"job {number} in {path} is missing {', '.join(missing)}")
+    return jobs
+
+
+def run_job(job):  # Runs in a worker process, errors are returned rather than raised so one bad feed can't stop the batch
+    result = {"source": job["source"], "week": job["week"], "output": job["output"], "ok": False}
+    started = time.perf_counter()
+    try:
+        day = datetime.strptime(job["week"], "%Y-%m-%d")
+        store = load_feed(job["source"])
+        loaded = time.perf_counter()
+        export_week(store, week_dates_for(day), job["output"])
+        result["load_seconds"] = round(loaded - started, 4)
+        result["export_seconds"] = round(time.perf_counter() - loaded, 4)
+        result["ok"] = True
+    except Exception as e:
+        result["error"] = f"{type(e).__name__}: {e}"
+    result["seconds"] = round(time.perf_counter() - started, 4)
+    return result
+
+
+def failed_result(job, error):  # Result of a job whose worker process died, so run_job couldn't report it
+    return {"source": job["source"], "week": job["week"], "output": job["output"], "ok": False,
+            "error": f"{type(error).__name__}: {error}", "seconds": 0.0}
+
+
+def run_batch(jobs, workers=None):  # Fans the jobs out over a process pool, results are in manifest order
+    workers = workers or os.cpu_count() or 1
+    results = [None] * len(jobs)
+    broken = []  # Jobs lost when a worker died, e.g. out of memory, the pool can't run anything after that
+    with ProcessPoolExecutor(max_workers=min(workers, len(jobs)) or 1) as executor:
+        futures = {executor.submit(run_job, job): index for index, job in enumerate(jobs)}
+        for future in as_completed(futures):
+            try:
+                results[futures[future]] = future.result()
+            except BrokenProcessPool:
+                broken.append(futures[future])
+            except Exception as e:  # e.g. a result that couldn't be sent back, the rest of the batch carries on
+                results[futures[future]] = failed_result(jobs[futures[future]], e)
+
+    for index in sorted(broken):  # Run again one at a time, so only the job that kills its worker is marked failed
+        with ProcessPoolExecutor(max_workers=1) as executor:
+            try:
+                results[index] = executor.submit(run_job, jobs[index]).result()
+            except BrokenProcessPool as e:
+                results[index] = failed_result(jobs[index], e)
+    return results
+
+
+def main(argv=None):  # Command line entry point for exporting many students' timetables at once
+    parser = argparse.ArgumentParser(description="Export many .ics timetables to Excel in parallel.")
+    parser.add_argument("manifest", help=".json or .csv manifest of jobs with source, week (YYYY-MM-DD) and output")
+    parser.add_argument("-j", "--workers", type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument("--report", help="also write per-job results and timings to this .json file")
+    args = parser.parse_args(argv)
+
+    try:
+        jobs = load_manifest(args.manifest)
+    except (OSError, ValueError) as e:
+        parser.error(str(e))
+
+    started = time.perf_counter()
+    results = run_batch(jobs, args.workers)
+    elapsed = time.perf_counter() - started
+
+    for result in results:
+        if result["ok"]:
+            print(f"ok     {result['seconds']:7.2f}s  {result['output']}")
+        else:
+            print(f"failed {result['seconds']:7.2f}s  {result['output']}: {result['error']}")
+
+    failures = sum(not result["ok"] for result in results)
+    print(f"{len(results) - failures}/{len(results)} timetables exported in {elapsed:.2f}s "
+          f"({len(results) / elapsed if elapsed else 0:.1f} per second)")
+
+    if args.report:
+        with open(args.report, "w") as file:
+            json.dump({"seconds": round(elapsed, 4), "results": results}, file, indent=2)
+
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
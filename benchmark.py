@@ -0,0 +1,264 @@
+from datetime import date, datetime, timedelta
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+import argparse
+import io
+import json
+import math
+import os
+import platform
+import random
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+
+from calendar_store import CalendarStore
+from feed_cache import clear_feed_cache, fetch_feed, save_feed_validators
+from ics_import import clean_location, iter_vevents, merge_events
+from serialisation import FORMATS, dumps, loads
+from timetable_export import build_workbook, plan_week, week_dates_for
+from week_layout import WeekLayoutCache, layout_week
+
+DEFAULT_SIZES = [100, 1000, 10000, 50000]
+TERM_START = date(2025, 2, 17)  # A Monday, synthetic terms start here
+SUBJECTS = ["COMP1511", "MATH1131", "PHYS1121", "ACCT1501", "ECON1101", "DESN1000", "CHEM1011", "ENGG1000"]
+CLASS_TYPES = ["Lecture", "Tutorial", "Laboratory", "Workshop", "Seminar"]
+BUILDINGS = ["K-E19-G05.Central Lecture Block 7", "K-J17-101.Ainsworth 101", "K-F8-G04.Law Theatre G04", "-"]
+
+
+def ics_line(line):  # Folds at 75 octets like real feeds, so the benchmark exercises unfolding
+    encoded = line.encode("utf-8")
+    parts = [encoded[:75]] + [b" " + encoded[i:i + 74] for i in range(75, len(encoded), 74)]
+    return b"\r\n".join(parts) + b"\r\n"
+
+
+def synthetic_feed(events, clash_density=0.2, recurring=0.8, weeks=None, seed=0):
+    # ICS feed shaped like an Allocate+ export: weekly classes repeated over the term plus one-off events.
+    # clash_density is the chance an event starts at the same time as one already on that day
+    rng = random.Random(seed)
+    weeks = weeks or max(13, math.ceil(events / 100))
+    days = [TERM_START + timedelta(weeks=week, days=weekday) for week in range(weeks) for weekday in range(5)]
+    starts_by_day = {}
+
+    def pick_start(day):
+        taken = starts_by_day.setdefault(day, [])
+        if taken and rng.random() < clash_density:
+            start = rng.choice(taken)
+        else:
+            start = rng.randrange(8 * 60, 18 * 60, 30)
+        taken.append(start)
+        return start
+
+    occurrences = []  # (day, start minutes, duration, summary, location)
+    while len(occurrences) < events * recurring:  # Weekly classes, one event per week like the real feeds
+        name = f"{rng.choice(SUBJECTS)} {rng.choice(CLASS_TYPES)}"
+        location = f"{rng.choice(BUILDINGS)} ({rng.randint(1, 3)}-{rng.randint(5, 10)}\\, 12)"
+        weekday, duration = rng.randrange(5), rng.choice([60, 60, 90, 120, 180])
+        for week in range(weeks):
+            day = TERM_START + timedelta(weeks=week, days=weekday)
+            occurrences.append((day, pick_start(day), duration, name, location))
+    del occurrences[int(events * recurring):]
+    while len(occurrences) < events:
+        day = rng.choice(days)
+        occurrences.append((day, pick_start(day), rng.choice([30, 60, 120]), f"{rng.choice(SUBJECTS)} Exam", "-"))
+
+    feed = io.BytesIO()
+    feed.write(b"BEGIN:VCALENDAR\r\nVERSION:2.0\r\nPRODID:-//UniPlanit//Benchmark//EN\r\n")
+    for number, (day, start, duration, name, location) in enumerate(occurrences):
+        begin = datetime.combine(day, datetime.min.time()) + timedelta(minutes=start)
+        end = begin + timedelta(minutes=duration)
+        feed.write(b"BEGIN:VEVENT\r\n")
+        feed.write(ics_line(f"UID:{number}-{seed}@benchmark.uniplanit"))
+        feed.write(ics_line(f"DTSTART;TZID=Australia/Sydney:{begin.strftime('%Y%m%dT%H%M%S')}"))
+        feed.write(ics_line(f"DTEND;TZID=Australia/Sydney:{end.strftime('%Y%m%dT%H%M%S')}"))
+        feed.write(ics_line(f"SUMMARY:{name}"))
+        feed.write(ics_line(f"LOCATION:{location}"))
+        feed.write(ics_line(f"DESCRIPTION:{name} for weeks 1-{weeks}\\nStaff: To be advised\\nNotes: " + "x" * 120))
+        if number % 10 == 0:  # Alarms have their own DESCRIPTION which the parser has to skip
+            feed.write(b"BEGIN:VALARM\r\nACTION:DISPLAY\r\nDESCRIPTION:Reminder\r\nTRIGGER:-PT15M\r\nEND:VALARM\r\n")
+        feed.write(b"END:VEVENT\r\n")
+    feed.write(b"END:VCALENDAR\r\n")
+    return feed.getvalue()
+
+
+class QuietHandler(SimpleHTTPRequestHandler):  # Serves the feed with Last-Modified so revalidation gets a 304
+    def log_message(self, *_args):
+        pass
+
+
+def serve_directory(directory):  # Local stand-in for the timetable server, returns the server and its base URL
+    server = ThreadingHTTPServer(("127.0.0.1", 0), partial(QuietHandler, directory=directory))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def best_time(function, repeat):  # Fastest of repeat runs in seconds, the least disturbed by the rest of the machine
+    times = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - started)
+    return min(times)
+
+
+def peak_memory(function):  # Peak bytes allocated by Python during one run, measured apart from the timings
+    tracemalloc.start()
+    try:
+        function()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def busiest_week(store):
+    counts = {}
+    for month_key, days in store.data.items():
+        for day_key, tasks in days.items():
+            day = datetime.strptime(f"{day_key}-{month_key}", "%d-%m-%Y")
+            monday = week_dates_for(day)[0]
+            counts[monday] = counts.get(monday, 0) + len(tasks)
+    return week_dates_for(max(counts, key=counts.get))
+
+
+def save_workbook(store, week_dates):
+    build_workbook(store, week_dates).save(io.BytesIO())
+
+
+def layout_weeks(store, mondays):
+    for monday in mondays:
+        layout_week(CalendarStore(store.data), monday)  # New store each week so no day index is reused
+
+
+def change_day(store, day):  # The week view's path when a task is added then removed, without the Kivy canvas redraw
+    task = {"text": "Benchmark", "type": "other", "start_time": "10:00", "end_time": "11:00", "start_minutes": 600,
+            "end_minutes": 660}
+    store.add_task(day, task)
+    store.remove_task(day, task)
+
+
+def benchmark_size(events, args, work_dir):  # Times every stage for one feed size, returns the results by stage
+    feed = synthetic_feed(events, args.clash_density, args.recurring, args.weeks, args.seed)
+    feed_name = f"feed-{events}.ics"
+    with open(os.path.join(work_dir, feed_name), "wb") as file:
+        file.write(feed)
+    cache_dir = os.path.join(work_dir, f"cache-{events}")
+    os.makedirs(cache_dir, exist_ok=True)
+    url = f"{args.base_url}/{feed_name}"
+
+    def fetch():
+        clear_feed_cache(cache_dir)
+        save_feed_validators(cache_dir, fetch_feed(url, cache_dir)[1])
+
+    fetch()
+    feed_path = os.path.join(cache_dir, "feed_cache.ics")
+
+    def parse():
+        with open(feed_path, "rb") as file:
+            return list(iter_vevents(file))
+
+    parsed = parse()
+    store = CalendarStore()
+    merge_events(store.data, parsed)
+    locations = [event["location"] for event in parsed]
+    week_dates = busiest_week(store)
+    mondays = [datetime.combine(TERM_START, datetime.min.time()) + timedelta(weeks=week) for week in range(13)]
+    shown_store = CalendarStore(store.data)  # Like the week view, a cached week is laid out again a day at a time
+    week_cache = WeekLayoutCache(shown_store)
+    week_cache.get(week_dates[0])
+    shown_store.subscribe(week_cache.update_day)
+
+    stages = [  # (name, function, items processed per run, what the items are)
+        ("fetch", fetch, len(feed), "bytes"),
+        ("revalidate", lambda: fetch_feed(url, cache_dir), 1, "requests"),
+        ("parse", parse, len(parsed), "events"),
+        ("merge", lambda: merge_events({}, parsed), len(parsed), "events"),
+        ("merge_unchanged", lambda: merge_events(store.data, parsed), len(parsed), "events"),
+        ("clean_location", lambda: [clean_location(location) for location in locations], len(locations), "locations"),
+        ("export_layout", lambda: plan_week(CalendarStore(store.data), week_dates), 1, "weeks"),
+        ("export_save", lambda: save_workbook(CalendarStore(store.data), week_dates), 1, "weeks"),
+        ("build_week", lambda: layout_weeks(store, mondays), len(mondays), "weeks"),
+        ("update_day", lambda: change_day(shown_store, week_dates[2]), 2, "updates")
+    ]
+    saved = {}  # The merged calendar in each save format, to compare how fast each one saves and loads
+    for file_format in FORMATS:
+        saved[file_format] = dumps(store.data, file_format)
+        stages.append((f"save_{file_format}", partial(dumps, store.data, file_format), len(parsed), "events"))
+        stages.append((f"load_{file_format}", partial(loads, saved[file_format]), len(parsed), "events"))
+
+    results = {}
+    for name, function, items, unit in stages:
+        seconds = best_time(function, args.repeat)
+        results[name] = {
+            "seconds": round(seconds, 6),
+            "items": items,
+            "unit": unit,
+            "per_second": round(items / seconds, 1) if seconds else None,
+            "peak_kib": round(peak_memory(function) / 1024, 1)
+        }
+    results["feed"] = {"events": len(parsed), "bytes": len(feed)}
+    results["save_bytes"] = {file_format: len(content) for file_format, content in saved.items()}
+    return results
+
+
+def compare(report, baseline, tolerance):  # Stages slower than the baseline by more than tolerance, as messages
+    regressions = []
+    for size, stages in report["sizes"].items():
+        for stage, result in stages.items():
+            previous = baseline.get("sizes", {}).get(size, {}).get(stage, {}).get("seconds")
+            if previous and result.get("seconds", 0) > previous * (1 + tolerance):
+                regressions.append(f"{stage} at {size} events: {result['seconds']:.4f}s, was {previous:.4f}s")
+    return regressions
+
+
+def main(argv=None):  # Command line entry point, prints a table and can write the results as JSON
+    parser = argparse.ArgumentParser(description="Benchmark the import, export and week view on synthetic feeds.")
+    parser.add_argument("--events", type=int, nargs="+", default=DEFAULT_SIZES, help="feed sizes to run")
+    parser.add_argument("--clash-density", type=float, default=0.2, help="chance an event clashes (default: 0.2)")
+    parser.add_argument("--recurring", type=float, default=0.8, help="share of weekly classes (default: 0.8)")
+    parser.add_argument("--weeks", type=int, default=None, help="weeks the feed covers (default: 13, more for big feeds)")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per stage, the fastest is kept (default: 3)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("-o", "--output", help="write the results as JSON to this file")
+    parser.add_argument("--compare", help="JSON results of an earlier run, slower stages make the run fail")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed slowdown against --compare (default: 0.25)")
+    args = parser.parse_args(argv)
+
+    report = {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "settings": {"clash_density": args.clash_density, "recurring": args.recurring, "weeks": args.weeks,
+                     "repeat": args.repeat, "seed": args.seed},
+        "sizes": {}
+    }
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        server, args.base_url = serve_directory(work_dir)
+        try:
+            for events in args.events:
+                results = report["sizes"][str(events)] = benchmark_size(events, args, work_dir)
+                print(f"{events} events ({results['feed']['bytes'] / 1024:.0f} KiB)")
+                for stage, result in results.items():
+                    if stage not in ("feed", "save_bytes"):
+                        print(f"  {stage:<16} {result['seconds'] * 1000:10.2f}ms "
+                              f"{result['per_second'] or 0:14.1f} {result['unit']}/s {result['peak_kib']:10.1f} KiB peak")
+        finally:
+            server.shutdown()
+            server.server_close()
+
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(report, file, indent=2)
+
+    if args.compare:
+        with open(args.compare) as file:
+            regressions = compare(report, json.load(file), args.tolerance)
+        for regression in regressions:
+            print(f"regression: {regression}")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,301 @@
+from collections import OrderedDict
+from collections.abc import MutableMapping
+from contextlib import contextmanager
+import hashlib
+import json
+import os
+import re
+
+from calendar_store import normalise_task
+from file_utils import atomic_write
+from ics_import import index_uni_tasks
+from serialisation import find, load, loads, save_as
+
+SHARD_FOLDER = "calendar"  # One "MM-YYYY.json" file per month, holding {"generation": n, "days": {"DD": [task, ...]}}
+# in whichever serialisation format is set ("MM-YYYY.bin" for binary), the manifest and journal are always plain json
+MANIFEST_FILE = "manifest.json"  # Generation of the last compaction, in case the journal is missing
+JOURNAL_FILE = "changes.journal"  # One JSON line per task change made since the last compaction
+UID_INDEX_STEM = "uid_index"  # Where every imported task is stored by UID, so imports don't read every month
+LEGACY_SNAPSHOT_FILE = "saved_state.json"  # Single file calendar saved by older versions, migrated on first load
+LEGACY_JOURNAL_FILE = "saved_state.journal"
+COMPACT_AFTER = 500  # Changes kept in the journal before they are written into the month files
+RESIDENT_MONTHS = 6  # Months kept in memory, enough for the term view plus the weeks around the shown one
+SHARD_NAME = re.compile(r"(\d{2}-\d{4})\.(?:json|bin)")  # Anything else in the folder, e.g. a temp file, is not a month
+
+
+def month_of(date_text):  # "2025-03-05" -> ("03-2025", "05")
+    year, month, day = date_text.split("-")
+    return f"{month}-{year}", day
+
+
+def apply_change(days, change):  # Replays one journal line on the days of its month
+    tasks = days.setdefault(month_of(change["date"])[1], [])
+    if change["op"] == "add":
+        tasks.append(change["task"])
+    elif change["op"] == "update":
+        tasks[change["index"]] = change["task"]
+    elif change["op"] == "remove":
+        del tasks[change["index"]]
+    else:
+        raise ValueError(f"unknown journal operation {change['op']!r}")
+
+
+def load_legacy(directory):  # saved_state.json with the journal of the previous version replayed on it
+    with open(os.path.join(directory, LEGACY_SNAPSHOT_FILE), "rb") as file:
+        content = file.read()
+    data = loads(content) if content.strip() else {}
+    try:
+        with open(os.path.join(directory, LEGACY_JOURNAL_FILE), "rb") as file:
+            lines = file.read().split(b"\n")
+        if json.loads(lines[0]).get("base") == hashlib.sha1(content).hexdigest():
+            for line in lines[1:]:
+                if line.strip():
+                    change = json.loads(line)
+                    apply_change(data.setdefault(month_of(change["date"])[0], {}), change)
+    except (OSError, ValueError, LookupError):
+        pass  # No journal, or the end of it was torn, the changes before that are kept
+    return data
+
+
+class ShardedCalendar(MutableMapping):
+    # calendar_data ({"MM-YYYY": {"DD": [task, ...]}}) saved as one file per month and read a month at a time when
+    # something asks for it, so startup and memory depend on the weeks looked at rather than years of history.
+    # Single task changes are appended to a journal instead of rewriting their month. A compaction first appends
+    # the new generation to the journal, then writes the changed months under it, then the manifest, then an empty
+    # journal. Each journal line is only replayed on month files no newer than the generation it was written under,
+    # so a compaction interrupted part way loses nothing, applies nothing twice, and changes made after it still apply
+    def __init__(self, directory, resident_months=RESIDENT_MONTHS, compact_after=COMPACT_AFTER):
+        self.directory = directory
+        self.folder = os.path.join(directory, SHARD_FOLDER)
+        self.resident_months = resident_months
+        self.compact_after = compact_after
+        self.months = OrderedDict()  # Loaded months, least recently used first
+        self.known_months = set()  # Every month with a file or loaded in memory
+        self.dirty = set()  # Months changed in bulk, not journalled, so they must be written before they are dropped
+        self.pending = {}  # Month -> (generation, journal line) of that month's changes not written into its file yet
+        self.changes = 0
+        self.generation = 0
+        self.pins = 0
+        self.file = None
+        self.on_evict = None  # Called with the month key when a month is dropped from memory
+        self.uid_index = None  # index_uni_tasks() of the whole calendar, read by the first import then kept up to date
+
+    def shard_path(self, month_key):  # Without the extension, which depends on the save format
+        return os.path.join(self.folder, month_key)
+
+    def exists(self):
+        return os.path.isdir(self.folder) or os.path.exists(os.path.join(self.directory, LEGACY_SNAPSHOT_FILE))
+
+    def load(self):  # Reads only the manifest, the journal and the folder listing, months are read when used
+        os.makedirs(self.folder, exist_ok=True)
+        legacy_path = os.path.join(self.directory, LEGACY_SNAPSHOT_FILE)
+        if os.path.exists(legacy_path) and not os.listdir(self.folder):
+            self.migrate(load_legacy(self.directory))
+            os.replace(legacy_path, legacy_path + ".bak")  # Kept as a backup, newer versions don't read it
+            if os.path.exists(os.path.join(self.directory, LEGACY_JOURNAL_FILE)):
+                os.remove(os.path.join(self.directory, LEGACY_JOURNAL_FILE))
+
+        self.known_months = set()
+        for name in os.listdir(self.folder):
+            if name.startswith(".tmp-"):  # Left by a save that was cut off, the file it was replacing is intact
+                os.remove(os.path.join(self.folder, name))
+                continue
+            match = SHARD_NAME.fullmatch(name)
+            if match:
+                self.known_months.add(match.group(1))
+        try:
+            with open(os.path.join(self.folder, MANIFEST_FILE)) as file:
+                self.generation = json.load(file)["generation"]
+        except (OSError, ValueError, LookupError):
+            self.generation = 0
+
+        torn = False
+        try:
+            with open(os.path.join(self.folder, JOURNAL_FILE), "rb") as file:
+                lines = file.read().split(b"\n")
+        except FileNotFoundError:
+            lines = []
+        if lines and lines[0].strip():
+            manifest_generation = self.generation
+            kept = 0  # Bytes of the journal read without error
+            try:
+                self.generation = json.loads(lines[0])["generation"]
+                kept = len(lines[0]) + 1
+                for line in lines[1:]:
+                    if line.strip():
+                        change = json.loads(line)
+                        if "op" in change:
+                            month_key = month_of(change["date"])[0]
+                            self.pending.setdefault(month_key, []).append((self.generation, change))
+                            self.known_months.add(month_key)
+                            self.changes += 1
+                        else:  # A compaction started, the lines after this were made after its month files
+                            self.generation = change["generation"]
+                    kept += len(line) + 1
+            except (ValueError, LookupError):
+                torn = True  # The app stopped mid-write, every change before the broken line is kept
+                os.truncate(os.path.join(self.folder, JOURNAL_FILE), kept)  # So new lines don't join the broken one
+            # A compaction stopped before writing the manifest, or before resetting the journal
+            torn = torn or self.generation != manifest_generation
+
+        if torn:
+            self.compact()
+        return self
+
+    def migrate(self, data):  # Writes a whole calendar as month files, used for data saved by older versions
+        self.generation += 1
+        for month_key, days in data.items():
+            for tasks in days.values():
+                for task in tasks:
+                    normalise_task(task)  # Data saved by older versions only has "HH:MM" strings
+            save_as(self.shard_path(month_key), {"generation": self.generation, "days": days})
+        self.uid_index = index_uni_tasks(data)
+        self.write_uid_index()
+        self.write_manifest()
+        atomic_write(os.path.join(self.folder, JOURNAL_FILE), json.dumps({"generation": self.generation}) + "\n")
+
+    def load_month(self, month_key):
+        path = find(self.shard_path(month_key))  # None for a month only in the journal so far
+        days, generation = {}, 0
+        try:
+            if path is not None:
+                shard = load(path)
+                days, generation = shard["days"], shard["generation"]
+                for tasks in days.values():
+                    for task in tasks:
+                        if normalise_task(task):
+                            self.dirty.add(month_key)
+        except (ValueError, LookupError, TypeError, AttributeError) as e:  # Corrupt, the other months still load
+            print(f"Error loading saved data for {month_key}: {e}")
+            os.replace(path, path + ".corrupt")  # Kept aside for recovery, the month starts again from the journal
+            days, generation = {}, 0
+
+        for line_generation, change in self.pending.get(month_key, []):
+            if generation > line_generation:
+                continue  # Written into the month file by a compaction that didn't finish
+            try:
+                apply_change(days, json.loads(json.dumps(change)))  # Copied, the loaded tasks can be edited
+            except (LookupError, ValueError):
+                pass  # Edits a task of a corrupt month file that no longer exists
+        return days
+
+    def __getitem__(self, month_key):
+        days = self.months.get(month_key)
+        if days is None:
+            if month_key not in self.known_months:
+                raise KeyError(month_key)
+            days = self.months[month_key] = self.load_month(month_key)
+            self.evict()
+        else:
+            self.months.move_to_end(month_key)
+        return days
+
+    def __setitem__(self, month_key, days):  # Months created in bulk, e.g. by an import, are written at the next save
+        self.months[month_key] = days
+        self.months.move_to_end(month_key)
+        self.known_months.add(month_key)
+        self.dirty.add(month_key)
+        self.evict()
+
+    def __delitem__(self, month_key):
+        if month_key not in self.known_months:
+            raise KeyError(month_key)
+        self[month_key] = {}  # Written as an empty month
+
+    def __iter__(self):
+        return iter(sorted(self.known_months, key=lambda month_key: (month_key[3:], month_key[:2])))
+
+    def __len__(self):
+        return len(self.known_months)
+
+    def read_uid_index(self):  # Only reads the saved file, so it can run on a worker thread
+        path = find(os.path.join(self.folder, UID_INDEX_STEM))
+        if path is None:
+            return {}  # Nothing imported yet, or saved by a version without the index
+        try:
+            index = load(path)
+        except (OSError, ValueError) as e:
+            print(f"Error loading saved data for the import index: {e}")
+            return {}
+        # An empty index only costs the next import re-adding every event, they replace the saved ones by UID
+        return index if isinstance(index, dict) else {}
+
+    def write_uid_index(self):
+        save_as(os.path.join(self.folder, UID_INDEX_STEM), self.uid_index)
+
+    def mark_dirty(self, day):  # A day was changed without going through the journal
+        self.dirty.add(day.strftime("%m-%Y"))
+
+    @contextmanager
+    def pinned(self):  # Nothing is dropped from memory inside, for bulk changes that hold on to tasks of many months
+        self.pins += 1
+        try:
+            yield self
+        finally:
+            self.pins -= 1
+            self.evict()
+
+    def evict(self):
+        if self.pins:
+            return
+        for month_key in list(self.months):
+            if len(self.months) <= self.resident_months:
+                break
+            if month_key in self.dirty:
+                continue  # Only on disk once saved
+            del self.months[month_key]
+            if self.on_evict:
+                self.on_evict(month_key)
+
+    def write_journal_line(self, line):
+        if self.file is None:
+            path = os.path.join(self.folder, JOURNAL_FILE)
+            new_file = not os.path.exists(path)
+            self.file = open(path, "ab")
+            if new_file:
+                self.file.write(json.dumps({"generation": self.generation}).encode() + b"\n")
+
+        self.file.write(line.encode() + b"\n")
+        self.file.flush()
+        os.fsync(self.file.fileno())  # The line survives a crash once this returns
+
+    def append(self, change):  # Writes one change durably, compacts once the journal is long
+        line = json.dumps(change)
+        self.write_journal_line(line)
+        month_key = month_of(change["date"])[0]
+        # A copy, later edits to the task are separate
+        self.pending.setdefault(month_key, []).append((self.generation, json.loads(line)))
+        self.known_months.add(month_key)
+        self.changes += 1
+
+        if self.changes >= self.compact_after:
+            self.compact()
+
+    def compact(self):  # Writes every month changed since the last compaction and starts a new journal
+        changed = {}
+        for month_key in sorted(self.dirty | set(self.pending)):  # Read before the generation moves on
+            days = self.months.get(month_key)
+            changed[month_key] = days if days is not None else self.load_month(month_key)
+        # If this fails part way the journal still holds every change, and the ones made after it are kept apart from
+        # the ones already in the new month files
+        self.write_journal_line(json.dumps({"generation": self.generation + 1}))
+        self.close()
+        self.generation += 1
+        for month_key, days in changed.items():
+            save_as(self.shard_path(month_key), {"generation": self.generation, "days": days})
+        if self.dirty and self.uid_index is not None:  # Imports change months in bulk. Written after the months, an
+            self.write_uid_index()  # index behind them is harmless as imports replace tasks by UID wherever they are
+        self.write_manifest()
+        atomic_write(os.path.join(self.folder, JOURNAL_FILE), json.dumps({"generation": self.generation}) + "\n")
+        self.dirty.clear()
+        self.pending.clear()
+        self.changes = 0
+        self.evict()
+
+    def write_manifest(self):
+        atomic_write(os.path.join(self.folder, MANIFEST_FILE), json.dumps({"generation": self.generation}))
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+            self.file = None
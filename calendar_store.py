@@ -0,0 +1,126 @@
+from bisect import bisect_left
+from datetime import datetime
+
+
+def parse_minutes(time_text):  # "09:30" -> 570 minutes since midnight
+    hours, minutes = time_text.split(":")
+    return int(hours) * 60 + int(minutes)
+
+
+def format_minutes(minutes):  # 570 -> "09:30", only used for display
+    return f"{minutes // 60:02d}:{minutes % 60:02d}"
+
+
+def is_timed(task):
+    return "start_minutes" in task and "end_minutes" in task
+
+
+def normalise_task(task):  # Adds integer times to tasks saved with only "HH:MM" strings, returns True if it changed
+    if is_timed(task) or "start_time" not in task or "end_time" not in task:
+        return False
+    task["start_minutes"] = parse_minutes(task["start_time"])
+    task["end_minutes"] = parse_minutes(task["end_time"])
+    return True
+
+
+def as_date(day):  # Week dates are datetimes, the index is keyed by plain dates
+    return day.date() if isinstance(day, datetime) else day
+
+
+class CalendarStore:  # Wraps calendar_data ({"MM-YYYY": {"DD": [task, ...]}}) with a per-day index sorted by start time
+    def __init__(self, data=None):
+        self.data = data if data is not None else {}  # Same layout as saved_state.json so saving stays unchanged
+        self.day_index = {}  # date -> (start minutes, (start, end, task) entries sorted by start, longest task duration)
+        self.listeners = []  # Called with the date of each day whose tasks change, or None when any day may have
+        self.journal = None  # Optional ShardedCalendar, each change made through the methods below is saved as it happens
+
+    def subscribe(self, callback):
+        self.listeners.append(callback)
+
+    def replace(self, data):  # Used when loading, the old index no longer applies
+        self.data = data
+        self.invalidate()
+
+    def forget_month(self, month_key):  # Drops the index of a month's days without notifying, their tasks are unchanged
+        for day in [day for day in self.day_index if day.strftime("%m-%Y") == month_key]:
+            del self.day_index[day]
+
+    def invalidate(self, day=None):  # Drop the index for one day, or every day if changes were made in bulk
+        if day is None:
+            self.day_index.clear()
+        else:
+            day = as_date(day)
+            self.day_index.pop(day, None)
+        for callback in self.listeners:  # Views redraw only what changed
+            callback(day)
+
+    def day_tasks(self, day):
+        return self.data.get(day.strftime("%m-%Y"), {}).get(day.strftime("%d"), [])
+
+    def untimed_tasks(self, day):
+        return [task for task in self.day_tasks(day) if not is_timed(task)]
+
+    def timed_tasks(self, day):  # Timed tasks of the day ordered by start time
+        return [task for _start, _end, task in self.get_day_index(day)[1]]
+
+    def get_day_index(self, day):  # Built on first use and kept until the day changes
+        day = as_date(day)
+        index = self.day_index.get(day)
+        if index is None:
+            entries = sorted(
+                ((task["start_minutes"], task["end_minutes"], task) for task in self.day_tasks(day) if is_timed(task)),
+                key=lambda entry: (entry[0], entry[1])
+            )
+            starts = [start for start, _end, _task in entries]
+            longest = max((end - start for start, end, _task in entries), default=0)
+            index = self.day_index[day] = (starts, entries, longest)
+        return index
+
+    def tasks_overlapping(self, day, start_minute, end_minute):  # Timed tasks of the day overlapping [start, end)
+        starts, entries, longest = self.get_day_index(day)
+        # A task can only overlap if it starts before end_minute and no earlier than start_minute minus the longest task
+        first = bisect_left(starts, start_minute - longest)
+        last = bisect_left(starts, end_minute)
+        # Zero length tasks take up their start minute, like in the week view and the export
+        return [task for start, end, task in entries[first:last] if max(end, start + 1) > start_minute]
+
+    def record(self, op, day, task=None, index=None):  # Journals a change, index is the task's position in its day
+        if self.journal is None:
+            return
+        change = {"op": op, "date": day.strftime("%Y-%m-%d")}
+        if task is not None:
+            change["task"] = task
+        if index is not None:
+            change["index"] = index
+        self.journal.append(change)
+
+    def task_position(self, day, task):
+        for position, stored_task in enumerate(self.day_tasks(day)):
+            if stored_task is task:  # Compare identity, two tasks can have identical fields
+                return position
+        return None
+
+    def add_task(self, day, task):
+        self.data.setdefault(day.strftime("%m-%Y"), {}).setdefault(day.strftime("%d"), []).append(task)
+        self.record("add", day, task)
+        self.invalidate(day)
+
+    def update_task(self, day, task, changes):  # Edits a task in place, moving it to another day is remove then add
+        task.update(changes)
+        if "start_time" in changes or "end_time" in changes:
+            task.pop("start_minutes", None)
+            task.pop("end_minutes", None)
+            normalise_task(task)
+        position = self.task_position(day, task)
+        if position is not None:
+            self.record("update", day, task, position)
+        self.invalidate(day)
+
+    def remove_task(self, day, task):
+        position = self.task_position(day, task)
+        if position is None:
+            return False
+        del self.day_tasks(day)[position]
+        self.record("remove", day, index=position)
+        self.invalidate(day)
+        return True
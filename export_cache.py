@@ -0,0 +1,36 @@
+import os
+import shutil
+
+from file_utils import atomic_open
+from timetable_export import StyleRegistry, build_workbook, week_fingerprint
+
+MAX_CACHED_EXPORTS = 10  # Oldest workbooks are removed once the cache holds more than this
+
+
+def cached_export_week(store, week_dates, output_path, cache_dir, styles=None, slot_minutes=60):
+    # Exports a week, reusing the workbook generated last time if the week's tasks and styling are unchanged.
+    # Returns True if the cached workbook was used
+    styles = styles or StyleRegistry()
+    cached_path = os.path.join(cache_dir, f"{week_fingerprint(store, week_dates, styles, slot_minutes)}.xlsx")
+
+    hit = os.path.exists(cached_path)
+    if hit:
+        os.utime(cached_path)  # Most recently used workbooks are kept when pruning
+    else:
+        with atomic_open(cached_path) as file:  # A crash mid-save can't leave a broken workbook under a valid hash
+            build_workbook(store, week_dates, styles, slot_minutes).save(file)
+        prune_export_cache(cache_dir)
+
+    if os.path.abspath(cached_path) != os.path.abspath(output_path):
+        shutil.copyfile(cached_path, output_path)
+    return hit
+
+
+def prune_export_cache(cache_dir, keep=MAX_CACHED_EXPORTS):
+    workbooks = [entry for entry in os.scandir(cache_dir) if entry.name.endswith(".xlsx")]
+    workbooks.sort(key=lambda entry: entry.stat().st_mtime, reverse=True)
+    for entry in workbooks[keep:]:
+        try:
+            os.remove(entry.path)
+        except OSError:
+            pass  # Another export may have removed it already
@@ -0,0 +1,62 @@
+import json
+import os
+
+import requests
+
+from file_utils import atomic_open, atomic_write
+
+CACHE_BODY_FILE = "feed_cache.ics"  # Raw body of the last downloaded feed
+CACHE_META_FILE = "feed_cache.json"  # URL, ETag and Last-Modified of the cached body
+
+
+def load_cache_meta(cache_dir):
+    try:
+        with open(os.path.join(cache_dir, CACHE_META_FILE)) as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return {}  # Missing or corrupt metadata just means the next request is unconditional
+
+
+def clear_feed_cache(cache_dir):  # Forces the next fetch to download the full feed again
+    for file_name in (CACHE_META_FILE, CACHE_BODY_FILE):
+        try:
+            os.remove(os.path.join(cache_dir, file_name))
+        except FileNotFoundError:
+            pass
+
+
+def save_feed_validators(cache_dir, validators):  # Call once the downloaded feed has been imported and saved
+    atomic_write(os.path.join(cache_dir, CACHE_META_FILE), json.dumps(validators))
+
+
+def fetch_feed(url, cache_dir, session=None, timeout=30):
+    # Returns the path of the freshly downloaded body and its validators (URL, ETag and Last-Modified), or None if
+    # the server says the cached copy is still current. The validators are not saved here, only save_feed_validators
+    # makes later fetches conditional, so a feed that never got imported is downloaded again
+    session = session or requests
+    body_path = os.path.join(cache_dir, CACHE_BODY_FILE)
+    meta = load_cache_meta(cache_dir)
+
+    headers = {}
+    if meta.get("url") == url and os.path.exists(body_path):  # Only validate a cache made for the same link
+        if meta.get("etag"):
+            headers["If-None-Match"] = meta["etag"]
+        if meta.get("last_modified"):
+            headers["If-Modified-Since"] = meta["last_modified"]
+
+    with session.get(url, headers=headers, stream=True, timeout=timeout) as response:
+        if response.status_code == 304:
+            return None
+
+        response.raise_for_status()
+        with atomic_open(body_path) as file:  # Stream to disk so the body is never held in memory as a whole
+            for chunk in response.iter_content(chunk_size=64 * 1024):
+                file.write(chunk)
+
+        validators = {
+            "url": url,
+            "etag": response.headers.get("ETag"),
+            "last_modified": response.headers.get("Last-Modified")
+        }
+
+    return body_path, validators
@@ -0,0 +1,25 @@
+from contextlib import contextmanager
+import os
+import tempfile
+
+
+@contextmanager
+def atomic_open(path, mode="wb"):  # Writes go to a temp file in the same folder which replaces path only once complete
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(dir=directory, prefix=".tmp-", suffix=os.path.basename(path))
+    try:
+        with os.fdopen(fd, mode) as file:
+            yield file
+            file.flush()
+            os.fsync(file.fileno())  # Make sure the data is on disk before the rename makes it visible
+        os.replace(temp_path, path)  # Atomic on all platforms, readers see either the old or the new file
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+
+def atomic_write(path, data):  # Convenience wrapper for writing a whole str or bytes value
+    with atomic_open(path, "w" if isinstance(data, str) else "wb") as file:
+        file.write(data)
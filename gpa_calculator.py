@@ -11,9 +11,12 @@ from kivy.clock import Clock
 from kivy.core.window import Window
 from kivy.properties import StringProperty
 from kivymd.toast import toast
-import json
 import os
 
+from autosave import CoalescingWriter
+from marks_aggregates import MarksAggregates
+from serialisation import dumps, find, load, path_for
+
 
 class WidgetsUI(MDBoxLayout):  # Class needed to define the user interface, cannot be created in kv as app requires backend python
     degree_marks_text_font_size = StringProperty("18sp")
@@ -31,6 +34,11 @@ class MarksApp(MDApp):  # Class used to define backend logic
         self.focusable_fields_grid = []  # Stores textboxes in order to be movable with keyboard button presses
         self.rows_count_dictionary = {}  # Used to store how many widgets there are for each semester
         self.menu = None  # Used to initially define the menu widget for dropdown
+        self.marks = MarksAggregates()  # Running WAM totals, updated one row at a time as marks and credits are typed
+        self.changed_semesters = set()  # Semesters whose labels are out of date until the next update
+        # Saves on a background thread at most every couple of seconds, so typing never waits for the disk
+        self.save_stem = os.path.join(self.user_data_dir, "saved_state")  # .json, or .bin if the binary format is chosen
+        self.writer = CoalescingWriter(path_for(self.save_stem), serialise=dumps)
 
     def build(self):  # Function defines main properties of app
         self.theme_cls.primary_palette = "Blue"
@@ -46,6 +54,11 @@ class MarksApp(MDApp):  # Class used to define backend logic
     def on_start(self):
         self.load_data()  # Load in pre-entered values by user. On start used as running this in build is too early and slow
 
+    def on_stop(self):
+        Clock.unschedule(self._do_update)
+        self._do_update(0)  # Include anything typed in the last 0.3 seconds
+        self.writer.close()  # Wait for the last write so closing the app can't lose changes
+
     def on_window_resize(self, _1, width, _2):  # Adapt marks output box according to screen size (_1 and _2 not used)
         self.is_small_view = (width < 700)  # If small view, track flag as true to make UI changes to input boxes
         if width < 600:
@@ -170,22 +183,15 @@ class MarksApp(MDApp):  # Class used to define backend logic
                 "credit": credit
             })
 
-        save_path = os.path.join(self.user_data_dir, "saved_state.json")  # Compatible file path for all platforms
-        try:
-            os.makedirs(self.user_data_dir, exist_ok=True)
-            with open(save_path, "w") as file:
-                json.dump(data, file, indent=2)  # Indent used for readability of json
-        except Exception as e:
-            print(f"Failed to save data: {e}")  # Used in event of any errors, then they will be printed
+        self.writer.submit(data)  # Written to saved_state.json in the background, replacing any older unsaved state
 
     def load_data(self):  # Function runs to load all data saved in json
         try:
-            save_path = os.path.join(self.user_data_dir, "saved_state.json")
-            if not os.path.exists(save_path):
+            save_path = find(self.save_stem)  # The file saved last if the save format was changed since
+            if save_path is None:
                 return  # If first time launch, json does not exist, so end execution
 
-            with open(save_path, "r") as file:
-                data = json.load(file)  # Retrieve data from json
+            data = load(save_path)  # Retrieve data, the format is worked out from the file itself
 
             semesters = data.get("semesters", {})
             for semester_label, subjects in semesters.items():
@@ -247,6 +253,8 @@ class MarksApp(MDApp):  # Class used to define backend logic
         self.semester_marks_sections_dictionary.clear()  # Clear dictionary storing sections for semester marks
         self.subject_input_rows_array.clear()  # Clear the array storing dictionaries for each row
         self.rows_count_dictionary.clear()  # Clear dictionary storing semester count
+        self.marks.clear()  # Clear running totals of the previous semesters
+        self.changed_semesters.clear()
 
         for semester in range(1, int(semesters_in_degree) + 1):
             section_for_semester = MDBoxLayout(orientation="vertical", spacing=dp(10), size_hint_y=None)
@@ -345,6 +353,7 @@ class MarksApp(MDApp):  # Class used to define backend logic
 
         mark_field.fbind("text", lambda instance, val: self.validate_textbox(instance, val, 100))
         credit_field.fbind("text", lambda instance, val: self.validate_textbox(instance, val, 500))
+        self.track_row_marks(semester_label, mark_field, credit_field)
 
         for field in (subject_field, mark_field,
                       credit_field):  # Append the 3 textboxes to array to track them for allowing tab and arrow keys over textboxes
@@ -501,70 +510,34 @@ class MarksApp(MDApp):  # Class used to define backend logic
         if semester_label in self.rows_count_dictionary:
             self.rows_count_dictionary[semester_label] -= 1  # Decrement count of widgets in the semester
 
+        self.marks.remove_row(mark_widget)  # Take the row's mark out of the semester and degree totals
+        self.changed_semesters.add(semester_label)
+
         self.auto_update()  # Recalculate marks as a row was deleted, and save in the json file
 
+    def track_row_marks(self, semester_label, mark_field, credit_field):  # Keeps the row counted in the running totals
+        def update(*_):
+            self.marks.set_row(mark_field, semester_label, mark_field.text, credit_field.text)
+            self.changed_semesters.add(semester_label)
+
+        mark_field.fbind("text", update)
+        credit_field.fbind("text", update)
+        update()  # Count the text the fields start with
+
     def display_marks_to_interface(self):  # Function adds calculated WAMs and GPAs for degree and semesters to interface
+        # Totals are kept up to date as fields change, so only semesters changed since the last update are relabelled
+        for semester_name in self.changed_semesters:
+            labels = self.semester_labels_dictionary.get(semester_name)
+            if labels is None:
+                continue  # Semester was removed from the interface meanwhile
 
-        def calculate_marks(total_credits, total_weight):  # Nested function calculates wam, gpa, grade and returns them
-            wam = round(total_weight / total_credits, 2) if total_credits else 0
-            if wam >= 85:
-                grade = 'HD'
-                gpa_7 = 7.0
-                gpa_4 = 4.0
-            elif 85 > wam >= 75:
-                grade = 'D'
-                gpa_7 = 6.0
-                gpa_4 = 3.5
-            elif 75 > wam >= 65:
-                grade = 'C'
-                gpa_7 = 5.0
-                gpa_4 = 3.0
-            elif 65 > wam >= 50:
-                grade = 'P'
-                gpa_7 = 4.0
-                gpa_4 = 2.0
-            else:
-                grade = 'F'
-                gpa_7 = 0.0
-                gpa_4 = 0.0
-
-            return wam, grade, gpa_4, gpa_7
-
-        # Initialise variables to pass to nested function calculate_marks() for calculation
-        degree_total_weight = 0
-        degree_total_credits = 0
-        for semester_name, semester_subjects in self.subjects_marks_dictionary.items():  # Loop over each semester
-            sem_weight = 0
-            sem_credits = 0
-            for row in self.subject_input_rows_array:
-                if row["semester_label"] != semester_name:
-                    continue  # Skip rows from other semesters
-
-                mark_text = row["mark"].text.strip()
-                credit_text = row["credit"].text.strip()
-
-                if not mark_text or not credit_text:
-                    continue  # Skip incomplete rows and negative values to avoid throwing errors
-
-                try:
-                    mark = float(mark_text)
-                    credit = float(credit_text)
-
-                    degree_total_weight += mark * credit
-                    degree_total_credits += credit
-
-                    sem_weight += mark * credit
-                    sem_credits += credit
-                except Exception as e:  # try except used in case of invalid empty values for a subject (subject is ignored)
-                    print(f'Failed to calculate marks: {e}')
-                    continue
-            # Section for calculating and adding semester marks to UI
-            sem_wam, sem_grade, sem_gpa4, sem_gpa7 = calculate_marks(sem_credits, sem_weight)
-            self.semester_labels_dictionary[semester_name]["wam"].text = f"WAM: {sem_wam} {sem_grade}"
-            self.semester_labels_dictionary[semester_name]["gpa4"].text = f"GPA (4-point scale): {sem_gpa4}"
-            self.semester_labels_dictionary[semester_name]["gpa7"].text = f"GPA (7-point scale): {sem_gpa7}"
-
-        degree_wam, degree_grade, degree_gpa4, degree_gpa7 = calculate_marks(degree_total_credits, degree_total_weight)
+            sem_wam, sem_grade, sem_gpa4, sem_gpa7 = self.marks.semester_marks(semester_name)
+            labels["wam"].text = f"WAM: {sem_wam} {sem_grade}"
+            labels["gpa4"].text = f"GPA (4-point scale): {sem_gpa4}"
+            labels["gpa7"].text = f"GPA (7-point scale): {sem_gpa7}"
+        self.changed_semesters.clear()
+
+        degree_wam, degree_grade, degree_gpa4, degree_gpa7 = self.marks.degree_marks()
 
         # Add degree GPA and WAM to the interface
         self.root.ids.wam_label.text = f"WAM: {degree_wam} {degree_grade}"
@@ -620,6 +593,7 @@ class MarksApp(MDApp):  # Class used to define backend logic
 
             mark_field.fbind("text", lambda instance, val: self.validate_textbox(instance, val, 100))
             credit_field.fbind("text", lambda instance, val: self.validate_textbox(instance, val, 500))
+            self.track_row_marks(semester_label, mark_field, credit_field)  # Counts the loaded mark straight away
 
             # Add to grid for keyboard navigation
             self.focusable_fields_grid.append([subject_field, mark_field, credit_field])
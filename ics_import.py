@@ -0,0 +1,225 @@
+from datetime import datetime, timedelta, timezone
+import hashlib
+import re
+
+# Only these VEVENT properties are used by the app, everything else in the feed is skipped while reading
+KEPT_PROPERTIES = ("SUMMARY", "DTSTART", "DTEND", "DURATION", "LOCATION", "UID")
+
+ESCAPED_TEXT = re.compile(r"\\(.)")  # RFC 5545 escapes commas, semicolons, backslashes and newlines in text values
+DURATION_VALUE = re.compile(r"([+-]?)P(?:(\d+)W)?(?:(\d+)D)?(?:T(?:(\d+)H)?(?:(\d+)M)?(?:(\d+)S)?)?")  # e.g. "PT1H30M"
+
+
+def unfold_lines(lines):  # Joins folded lines (continuations start with a space or tab) and yields one property per line
+    pending = None
+    for line in lines:
+        line = line.rstrip(b"\r\n") if isinstance(line, bytes) else line.rstrip("\r\n")
+        if line[:1] in (" ", "\t", b" ", b"\t"):
+            if pending is not None:
+                pending += line[1:]  # Join before decoding so multibyte characters split by a fold stay intact
+            continue
+        if pending is not None:
+            yield pending.decode("utf-8", errors="replace") if isinstance(pending, bytes) else pending
+        pending = line
+    if pending is not None:
+        yield pending.decode("utf-8", errors="replace") if isinstance(pending, bytes) else pending
+
+
+def split_property(line):  # "DTSTART;TZID=Australia/Sydney:20250303T090000" -> ("DTSTART", "TZID=...", "20250303T090000")
+    in_quotes = False
+    for index, char in enumerate(line):  # Parameter values may be quoted and contain ':' so find the first unquoted one
+        if char == '"':
+            in_quotes = not in_quotes
+        elif char == ":" and not in_quotes:
+            name, _, params = line[:index].partition(";")
+            return name.upper(), params, line[index + 1:]
+    return line.upper(), "", ""
+
+
+def unescape_text(value):
+    return ESCAPED_TEXT.sub(lambda match: "\n" if match.group(1) in "nN" else match.group(1), value)
+
+
+def parse_ics_datetime(value):
+    value = value.strip()
+    if "T" not in value:  # All-day events only have a DATE value, treat them as starting at midnight
+        return datetime.strptime(value[:8], "%Y%m%d")
+
+    parsed = datetime.strptime(value[:15], "%Y%m%dT%H%M%S")
+    if value.endswith("Z"):  # UTC times are converted to the local wall clock, TZID times are already wall clock
+        parsed = parsed.replace(tzinfo=timezone.utc).astimezone().replace(tzinfo=None)
+    return parsed
+
+
+def parse_ics_duration(value):  # "PT1H30M" -> timedelta(hours=1, minutes=30)
+    match = DURATION_VALUE.fullmatch(value.strip().upper())
+    if match is None:
+        raise ValueError(f"invalid DURATION {value!r}")
+    sign, weeks, days, hours, minutes, seconds = match.groups()
+    duration = timedelta(weeks=int(weeks or 0), days=int(days or 0), hours=int(hours or 0),
+                         minutes=int(minutes or 0), seconds=int(seconds or 0))
+    return -duration if sign == "-" else duration
+
+
+def iter_vevents(lines):  # Streams events from an iterable of feed lines, only one event is held in memory at a time
+    event = None
+    nested_depth = 0  # VALARM and other components inside a VEVENT have their own SUMMARY etc. which must be ignored
+
+    for line in unfold_lines(lines):
+        if event is None:
+            if line.upper() == "BEGIN:VEVENT":
+                event = {}
+            continue
+
+        upper_line = line.upper()
+        if upper_line.startswith("BEGIN:"):
+            nested_depth += 1
+            continue
+        if upper_line.startswith("END:"):
+            if nested_depth:
+                nested_depth -= 1
+                continue
+            if upper_line == "END:VEVENT" and "DTSTART" in event:
+                yield build_event(event)
+            event = None
+            continue
+        if nested_depth:
+            continue
+
+        name, _params, value = split_property(line)
+        if name in KEPT_PROPERTIES and name not in event:
+            event[name] = value
+
+
+def build_event(properties):  # Converts the raw property values of one VEVENT into the fields used by the app
+    start = parse_ics_datetime(properties["DTSTART"])
+    if "DTEND" in properties:
+        end = parse_ics_datetime(properties["DTEND"])
+    elif "DURATION" in properties:  # Allowed instead of DTEND, e.g. "PT2H" for a two hour class
+        end = start + parse_ics_duration(properties["DURATION"])
+    else:
+        end = start
+
+    return {
+        "name": unescape_text(properties.get("SUMMARY", "")),
+        "begin": start,
+        "end": end,
+        "location": unescape_text(properties.get("LOCATION", "")),
+        "uid": properties.get("UID", "").strip()
+    }
+
+
+def clean_location(location):  # Shortens Allocate+ locations and drops the date ranges in brackets
+    if not location:
+        return "No location"
+
+    if location.strip() == "-":
+        return "(Online)"
+
+    parts = location.split(".")
+    cleaned_location = f"{parts[0]} {parts[-1]}"
+
+    cleaned_location = re.sub(r"\([^)]*\)", "", cleaned_location)  # remove date ranges in brackets
+
+    return cleaned_location.strip().rstrip(",")
+
+
+def event_hash(event):  # Content hash used to tell whether an event with a known UID has changed since the last import
+    content = "\x1f".join((event["name"], event["begin"].isoformat(), event["end"].isoformat(), event["location"]))
+    return hashlib.sha1(content.encode("utf-8")).hexdigest()[:16]
+
+
+def index_uni_tasks(calendar_data):  # UID of every imported task -> [(month_key, day_key, hash), ...] where it is stored
+    index = {}
+    for month_key, days in calendar_data.items():
+        for day_key, tasks in days.items():
+            for task in tasks:
+                if task.get("type") == "uni":  # Tasks saved before UIDs were kept are indexed under ""
+                    index.setdefault(task.get("uid") or "", []).append((month_key, day_key, task.get("hash")))
+    return index
+
+
+def stored_date(month_key, day_key):  # ("03-2025", "05") -> date(2025, 3, 5)
+    return datetime.strptime(f"{day_key}-{month_key}", "%d-%m-%Y").date()
+
+
+def remove_uni_task(calendar_data, month_key, day_key, key):  # Removes one imported task with this UID from a day
+    tasks = calendar_data.get(month_key, {}).get(day_key, [])
+    for position, task in enumerate(tasks):
+        if task.get("type") == "uni" and (task.get("uid") or "") == key:
+            del tasks[position]
+            return True
+    return False
+
+
+def task_entry(event, key, content_hash):  # The task saved for an imported event
+    return {
+        "text": event["name"],
+        "start_time": event["begin"].strftime("%H:%M"),
+        "end_time": event["end"].strftime("%H:%M"),
+        "start_minutes": event["begin"].hour * 60 + event["begin"].minute,
+        "end_minutes": event["end"].hour * 60 + event["end"].minute,
+        "location": clean_location(event["location"]),
+        "type": "uni",
+        "uid": key,
+        "hash": content_hash
+    }
+
+
+def diff_events(index, events):
+    # Works out what an import changes from index_uni_tasks() of the saved calendar without reading calendar_data,
+    # so it can run on a worker thread. events can be a stream, only the events that differ are kept. Returns
+    # (key, where the key is stored now, month_key, day_key, task to save there) for every change, with month_key,
+    # day_key and the task None if the key is to be removed
+    seen_keys = set()
+    changes = []
+
+    for event in events:
+        key = event["uid"]
+        if not key or key in seen_keys:  # Missing or repeated UIDs (recurrence overrides) are told apart by start time
+            key = f"{key}@{event['begin'].strftime('%Y%m%dT%H%M')}"
+        seen_keys.add(key)
+
+        content_hash = event_hash(event)
+        stored = index.get(key, [])
+        if len(stored) == 1 and stored[0][2] == content_hash:
+            continue  # Unchanged, nothing to do
+        month_key, day_key = event["begin"].strftime("%m-%Y"), event["begin"].strftime("%d")
+        changes.append((key, stored, month_key, day_key, task_entry(event, key, content_hash)))
+
+    if not seen_keys:
+        return changes  # An empty feed is more likely a broken link than a cleared timetable, so keep what is saved
+
+    for key, stored in index.items():  # Anything left over is no longer in the feed, including tasks saved without a UID
+        if key not in seen_keys:
+            changes.append((key, stored, None, None, None))
+    return changes
+
+
+def apply_changes(calendar_data, index, changes):
+    # Applies diff_events() to calendar_data and the index, only the months of changed tasks are read. The delta
+    # counts the tasks added, changed and removed and lists the dates whose tasks changed
+    delta = {"added": 0, "changed": 0, "removed": 0, "days": set()}
+
+    for key, stored, month_key, day_key, entry in changes:
+        for stored_month, stored_day, _hash in stored:  # Changed events are replaced wherever they were stored before
+            if remove_uni_task(calendar_data, stored_month, stored_day, key):
+                delta["days"].add(stored_date(stored_month, stored_day))
+                if entry is None:
+                    delta["removed"] += 1
+        if entry is None:
+            index.pop(key, None)
+            continue
+
+        while remove_uni_task(calendar_data, month_key, day_key, key):
+            pass  # Saved by an import the index had not caught up with, e.g. one cut off while saving
+        calendar_data.setdefault(month_key, {}).setdefault(day_key, []).append(entry)
+        index[key] = [(month_key, day_key, entry["hash"])]  # Replaced rather than changed, copies of the index stay valid
+        delta["changed" if stored else "added"] += 1
+        delta["days"].add(stored_date(month_key, day_key))
+
+    return delta
+
+
+def merge_events(calendar_data, events):  # Applies only the differences between the feed and the uni tasks, keyed by UID
+    index = index_uni_tasks(calendar_data)
+    return apply_changes(calendar_data, index, diff_events(index, events))
@@ -0,0 +1,47 @@
+from bisect import bisect_left
+import heapq
+
+
+def partition_intervals(intervals):
+    # Interval partitioning: each (start, end) gets the lowest column free at its start, in order of start time.
+    # Returns each interval's column and the number of columns needed, which is the most intervals overlapping at once
+    order = sorted(range(len(intervals)), key=lambda i: intervals[i][0])
+    columns = [0] * len(intervals)
+    active = []  # (end, column) of intervals still running
+    free = []  # Columns released by intervals that have ended
+    width = 0
+
+    for i in order:
+        start, end = intervals[i]
+        while active and active[0][0] <= start:
+            heapq.heappush(free, heapq.heappop(active)[1])
+        if free:
+            column = heapq.heappop(free)
+        else:
+            column = width
+            width += 1
+        columns[i] = column
+        heapq.heappush(active, (max(end, start + 1), column))  # Zero length intervals still take up their column
+
+    return columns, width
+
+
+def column_spans(intervals, columns, width):  # How many columns each interval can cover, widening right into free columns
+    starts_by_column = [[] for _ in range(width)]
+    ends_by_column = [[] for _ in range(width)]
+    for i in sorted(range(len(intervals)), key=lambda i: intervals[i][0]):
+        start, end = intervals[i]
+        starts_by_column[columns[i]].append(start)
+        ends_by_column[columns[i]].append(max(end, start + 1))  # Zero length intervals still take up their start
+
+    def column_is_free(column, start, end):  # Intervals in one column never overlap, so only the one before end can clash
+        position = bisect_left(starts_by_column[column], end) - 1
+        return position < 0 or ends_by_column[column][position] <= start
+
+    spans = []
+    for i, (start, end) in enumerate(intervals):
+        span = 1
+        while columns[i] + span < width and column_is_free(columns[i] + span, start, max(end, start + 1)):
+            span += 1
+        spans.append(span)
+    return spans
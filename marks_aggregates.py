@@ -0,0 +1,103 @@
+import math
+
+
+def calculate_marks(total_credits, total_weight):  # WAM, grade and both GPAs for a credit weighted total of marks
+    wam = round(total_weight / total_credits, 2) if total_credits else 0
+    if wam >= 85:
+        grade = 'HD'
+        gpa_7 = 7.0
+        gpa_4 = 4.0
+    elif 85 > wam >= 75:
+        grade = 'D'
+        gpa_7 = 6.0
+        gpa_4 = 3.5
+    elif 75 > wam >= 65:
+        grade = 'C'
+        gpa_7 = 5.0
+        gpa_4 = 3.0
+    elif 65 > wam >= 50:
+        grade = 'P'
+        gpa_7 = 4.0
+        gpa_4 = 2.0
+    else:
+        grade = 'F'
+        gpa_7 = 0.0
+        gpa_4 = 0.0
+
+    return wam, grade, gpa_4, gpa_7
+
+
+def row_contribution(mark_text, credit_text):  # (mark x credit, credit) of one subject row, None if it doesn't count
+    mark_text = mark_text.strip()
+    credit_text = credit_text.strip()
+    if not mark_text or not credit_text:
+        return None  # Incomplete rows are skipped, the user may still be typing
+
+    try:
+        mark = float(mark_text)
+        credit = float(credit_text)
+    except ValueError:
+        return None  # Not a number yet, e.g. "." while the user is still typing, the fields only accept numbers
+    if not (math.isfinite(mark) and math.isfinite(credit)):
+        return None  # A nan or inf would stay in the running totals for good
+    return mark * credit, credit
+
+
+class Totals:  # Running sums for a semester or the whole degree
+    def __init__(self):
+        self.weight = 0.0
+        self.credits = 0.0
+        self.rows = 0  # Rows counted, the sums are reset to exactly 0 when it drops to 0 so rounding can't build up
+
+    def add(self, weight, credits):
+        self.weight += weight
+        self.credits += credits
+        self.rows += 1
+
+    def subtract(self, weight, credits):
+        self.rows -= 1
+        if self.rows:
+            self.weight -= weight
+            self.credits -= credits
+        else:
+            self.weight = self.credits = 0.0
+
+    def marks(self):
+        return calculate_marks(self.credits, self.weight)
+
+
+class MarksAggregates:
+    # Per semester and degree totals of mark x credit and credits. Each edit takes off the old contribution of the
+    # row that changed and adds its new one, so working out the marks doesn't depend on how many subjects there are
+    def __init__(self):
+        self.rows = {}  # Row key -> (semester, weight, credits) of every row currently counted
+        self.semesters = {}  # Semester label -> Totals
+        self.degree = Totals()
+
+    def set_row(self, row_key, semester, mark_text, credit_text):  # Called when a mark or credit of a row changes
+        self.remove_row(row_key)
+        contribution = row_contribution(mark_text, credit_text)
+        if contribution is not None:
+            weight, credits = contribution
+            self.rows[row_key] = (semester, weight, credits)
+            self.semesters.setdefault(semester, Totals()).add(weight, credits)
+            self.degree.add(weight, credits)
+
+    def remove_row(self, row_key):
+        counted = self.rows.pop(row_key, None)
+        if counted is not None:
+            semester, weight, credits = counted
+            self.semesters[semester].subtract(weight, credits)
+            self.degree.subtract(weight, credits)
+
+    def semester_marks(self, semester):  # (wam, grade, gpa_4, gpa_7) of one semester
+        totals = self.semesters.get(semester)
+        return totals.marks() if totals is not None else calculate_marks(0, 0)
+
+    def degree_marks(self):
+        return self.degree.marks()
+
+    def clear(self):
+        self.rows.clear()
+        self.semesters.clear()
+        self.degree = Totals()
@@ -0,0 +1,74 @@
+import json
+import marshal
+import os
+
+from file_utils import atomic_write
+
+try:
+    import orjson  # Optional, several times faster than the json module when installed
+except ImportError:
+    orjson = None
+
+BINARY_MAGIC = b"UPB\x01"  # Starts every binary file, json files start with "{" or "[" so the two can't be confused
+MARSHAL_VERSION = 4  # Readable by every Python 3 release since 3.4
+FORMATS = ("json", "compact", "binary")
+EXTENSIONS = {"json": ".json", "compact": ".json", "binary": ".bin"}
+# "json" is indented for reading and debugging, "compact" is json without whitespace (written by orjson if installed)
+# and "binary" is marshal. Marshal is fast but Python doesn't promise to read it across versions or to reject corrupt
+# input safely, so it is only used when asked for. load reads every format, so it can change any time
+# Set UNIPLANIT_SAVE_FORMAT=json to save readable files while debugging, or =binary to try the binary format
+DEFAULT_FORMAT = os.environ.get("UNIPLANIT_SAVE_FORMAT", "compact")
+
+
+def dumps(data, file_format=None):  # Saved state as bytes, only dicts, lists, strings, numbers, booleans and None
+    file_format = file_format or DEFAULT_FORMAT
+    if file_format == "json":
+        return json.dumps(data, indent=2).encode()  # Indent used for readability of json
+    if file_format == "compact":
+        if orjson is not None:
+            return orjson.dumps(data)
+        return json.dumps(data, separators=(",", ":")).encode()
+    if file_format == "binary":
+        return BINARY_MAGIC + marshal.dumps(data, MARSHAL_VERSION)
+    raise ValueError(f"unknown save format {file_format!r}, expected one of {', '.join(FORMATS)}")
+
+
+def loads(content):  # Reads any of the formats, told apart by the first bytes
+    if content.startswith(BINARY_MAGIC):
+        try:
+            return marshal.loads(content[len(BINARY_MAGIC):])
+        except (EOFError, TypeError) as e:
+            raise ValueError(f"corrupt binary save file: {e}") from e
+    if orjson is not None:
+        return orjson.loads(content)  # orjson.JSONDecodeError is a ValueError like json's
+    return json.loads(content)
+
+
+def load(path):
+    with open(path, "rb") as file:
+        return loads(file.read())
+
+
+def save(path, data, file_format=None):  # Atomic, a crash mid-save leaves the previous file in place
+    atomic_write(path, dumps(data, file_format))
+
+
+def path_for(stem, file_format=None):  # "saved_state" -> "saved_state.json", or "saved_state.bin" for binary files
+    file_format = file_format or DEFAULT_FORMAT
+    if file_format not in EXTENSIONS:
+        raise ValueError(f"unknown save format {file_format!r}, expected one of {', '.join(FORMATS)}")
+    return stem + EXTENSIONS[file_format]
+
+
+def find(stem):  # Saved file of stem in whichever format it was written last, None if there isn't one
+    paths = [stem + extension for extension in sorted(set(EXTENSIONS.values())) if os.path.exists(stem + extension)]
+    return max(paths, key=os.path.getmtime, default=None)
+
+
+def save_as(stem, data, file_format=None):  # Saves under the format's extension and removes copies in other formats
+    path = path_for(stem, file_format)
+    save(path, data, file_format)
+    for extension in set(EXTENSIONS.values()) - {os.path.splitext(path)[1]}:
+        if os.path.exists(stem + extension):
+            os.remove(stem + extension)
+    return path
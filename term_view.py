@@ -0,0 +1,130 @@
+from datetime import date, timedelta
+
+from kivy.graphics import Color, InstructionGroup, Rectangle
+from kivy.metrics import dp, sp
+from kivy.properties import ColorProperty
+from kivy.uix.recycleboxlayout import RecycleBoxLayout
+from kivy.uix.recycleview import RecycleView
+from kivy.uix.recycleview.views import RecycleDataViewBehavior
+
+from calendar_store import as_date
+from week_grid import WeekCanvas, draw_text
+from week_layout import day_summary, monday_of
+
+TERM_WEEKS = 13
+
+
+class DaySummaryCache:  # Day summaries are only worked out when a row showing the day is drawn, then kept until it changes
+    def __init__(self, store):
+        self.store = store
+        self.summaries = {}
+
+    def get(self, day):
+        summary = self.summaries.get(day)
+        if summary is None:
+            summary = self.summaries[day] = day_summary(self.store, day)
+        return summary
+
+    def invalidate(self, day=None):
+        if day is None:
+            self.summaries.clear()
+        else:
+            self.summaries.pop(as_date(day), None)
+
+
+class WeekRow(RecycleDataViewBehavior, WeekCanvas):  # One week of the month or term view, reused as rows scroll past
+    outside_colour = ColorProperty((0.98, 0.98, 0.98, 1))  # Days of the neighbouring months in the month view
+    today_colour = ColorProperty((0.85, 0.9, 1, 1))
+
+    def __init__(self, **kwargs):
+        self.row = None
+        self.view = None
+        super().__init__(**kwargs)
+        self.time_column_width = dp(70)
+        self.text_colour = (0, 0, 0, 0.87)
+        self.group = InstructionGroup()
+        self.canvas.add(self.group)
+
+    def refresh_view_attrs(self, rv, index, data):  # Called by the RecycleView when the row is given another week
+        self.view = rv
+        self.row = data
+        self.redraw()
+
+    def redraw(self, *_):
+        group = self.group
+        group.clear()
+        if self.row is None:
+            return
+
+        pitch = self.column_pitch()
+        today = date.today()
+        month = self.view.month
+        draw_text(group, self.row["label"], self.x, self.y, self.time_column_width, self.height, sp(12),
+                  self.label_colour)
+
+        for index in range(7):
+            day = self.row["monday"] + timedelta(days=index)
+            x = self.day_x(index)
+            if day == today:
+                colour = self.today_colour
+            elif month is not None and day.month != month:
+                colour = self.outside_colour
+            else:
+                colour = self.cell_colour
+            group.add(Color(*colour))
+            group.add(Rectangle(pos=(x, self.y), size=(pitch - self.spacing, self.height)))
+
+            draw_text(group, day.strftime("%a %d"), x + dp(4), self.top - dp(20), pitch - self.spacing - dp(8), dp(18),
+                      sp(11), self.label_colour, halign="left")
+            draw_text(group, self.view.summaries.get(day), x + dp(4), self.y + dp(2), pitch - self.spacing - dp(8),
+                      self.height - dp(24), sp(10), self.text_colour, halign="left", valign="top")
+
+    def on_touch_down(self, touch):
+        if self.row is not None and self.collide_point(*touch.pos):
+            index = self.day_at(touch.x)
+            if index is not None:
+                self.view.dispatch("on_day_press", self.row["monday"] + timedelta(days=index))
+                return True
+        return super().on_touch_down(touch)
+
+
+class TermView(RecycleView):
+    # Month and multi-week term views fed from the same calendar store as the week view. Only the rows on screen
+    # exist as widgets, scrolling hands them other weeks. Tapping a day dispatches on_day_press with its date
+    __events__ = ("on_day_press",)
+
+    def __init__(self, store, **kwargs):
+        super().__init__(**kwargs)
+        self.summaries = DaySummaryCache(store)
+        self.month = None  # Month shown by show_month, days outside it are greyed out
+        layout = RecycleBoxLayout(orientation="vertical", default_size=(None, dp(110)), default_size_hint=(1, None),
+                                  size_hint_y=None, spacing=dp(4))
+        layout.bind(minimum_height=layout.setter("height"))
+        self.add_widget(layout)
+        self.viewclass = WeekRow  # Set once the layout exists, it is passed on to it
+
+    def show_month(self, year, month):
+        self.month = month
+        monday = monday_of(date(year, month, 1))
+        rows = []
+        while monday.month == month or not rows:  # Every week with a day in the month
+            rows.append({"monday": monday, "label": monday.strftime("%d %b")})
+            monday += timedelta(days=7)
+        self.data = rows
+        self.scroll_y = 1
+
+    def show_term(self, first_day, weeks=TERM_WEEKS):
+        self.month = None
+        rows = []
+        for week in range(weeks):
+            monday = monday_of(first_day) + timedelta(weeks=week)
+            rows.append({"monday": monday, "label": f"Week {week + 1}\n{monday.strftime('%d %b')}"})
+        self.data = rows
+        self.scroll_y = 1
+
+    def on_day_changed(self, day):  # Subscribed to the calendar store, only rows on screen are redrawn
+        self.summaries.invalidate(day)
+        self.refresh_from_data()
+
+    def on_day_press(self, day):
+        pass
@@ -0,0 +1,95 @@
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import hashlib
+import io
+import threading
+
+from calendar_journal import ShardedCalendar
+from calendar_store import CalendarStore
+from timetable_export import week_dates_for
+
+
+def task(text, start=540, end=600):
+    return {"text": text, "type": "other", "start_minutes": start, "end_minutes": end}
+
+
+def open_calendar(directory, **kwargs):
+    calendar = ShardedCalendar(str(directory), **kwargs).load()
+    store = CalendarStore(calendar)
+    store.journal = calendar
+    return calendar, store
+
+
+def texts(calendar, month_key, day_key):
+    return [saved["text"] for saved in calendar[month_key].get(day_key, [])]
+
+
+def timed(text, start, end):
+    return {"text": text, "type": "uni", "location": "Room", "start_minutes": start, "end_minutes": end}
+
+
+def week_store(rng=None, tasks_per_day=6):
+    store = CalendarStore()
+    monday = datetime(2025, 3, 3)
+    tasks = {
+        monday: [timed("Lecture", 540, 660), timed("Tutorial", 600, 660), timed("Lab", 630, 720)],
+        monday + timedelta(days=2): [timed("Half Tutorial", 630, 690), timed("Late", 1290, 1350)],
+    }
+    if rng is not None:
+        for day in range(5):
+            for _ in range(tasks_per_day):
+                start = rng.randrange(7 * 60, 21 * 60, 15)
+                tasks.setdefault(monday + timedelta(days=day), []).append(timed("Random", start,
+                                                                                start + rng.choice([15, 60, 90, 180])))
+    for day, day_tasks in tasks.items():
+        for task in day_tasks:
+            store.add_task(day, task)
+    return store, week_dates_for(monday)
+
+
+class FeedHandler(BaseHTTPRequestHandler):  # Serves server.feeds by path with an ETag, like the timetable server
+    def do_GET(self):
+        self.server.requests.append(dict(self.headers))
+        body = self.server.feeds.get(self.path)
+        if body is None:
+            self.send_error(404)
+            return
+        etag = f'"{hashlib.sha1(body).hexdigest()}"'
+        if self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("ETag", etag)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *_args):
+        pass
+
+
+def serve_feeds(feeds):  # Local timetable server for feeds ({path: body}), returns the server and its base URL
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FeedHandler)
+    server.feeds = feeds
+    server.requests = []  # Headers of every request, newest last
+    threading.Thread(target=server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def vevent(uid, start, end="", summary="COMP1511 Lecture", location="K-E19-G05.Central Lecture Block 7", extra=""):
+    lines = ["BEGIN:VEVENT", f"UID:{uid}", f"DTSTART;TZID=Australia/Sydney:{start}"]
+    if end:
+        lines.append(f"DTEND;TZID=Australia/Sydney:{end}")
+    lines += [f"SUMMARY:{summary}", f"LOCATION:{location}"]
+    return "\r\n".join(lines) + "\r\n" + extra + "END:VEVENT\r\n"
+
+
+def feed(*events):
+    return io.BytesIO(("BEGIN:VCALENDAR\r\nVERSION:2.0\r\n" + "".join(events) + "END:VCALENDAR\r\n").encode("utf-8"))
+
+
+def uni_tasks(calendar_data):  # (date, uid, text) of every imported task
+    return sorted((day_key + "-" + month_key, task["uid"], task["text"])
+                  for month_key, days in calendar_data.items() for day_key, tasks in days.items()
+                  for task in tasks if task.get("type") == "uni")
@@ -0,0 +1,93 @@
+import json
+import os
+import threading
+import time
+
+from autosave import CoalescingWriter
+
+
+class CountingSerialise:  # json.dumps that records each state it is asked to write
+    def __init__(self):
+        self.written = []
+        self.lock = threading.Lock()
+
+    def __call__(self, data):
+        with self.lock:
+            self.written.append(data)
+        if data == "fail":
+            return 12345  # Not bytes, so the write fails after the temp file was created
+        return json.dumps(data)
+
+
+def read(path):
+    with open(path) as file:
+        return json.load(file)
+
+
+def wait_until(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+
+def test_burst_of_changes_is_written_once_per_interval(tmp_path):
+    path = str(tmp_path / "saved_state.json")
+    serialise = CountingSerialise()
+    writer = CoalescingWriter(path, interval=0.3, serialise=serialise)
+    writer.submit({"mark": 0})
+    assert wait_until(lambda: serialise.written == [{"mark": 0}])  # Nothing written yet, so no wait
+
+    for mark in range(1, 50):  # e.g. typing, every keystroke submits the whole state
+        writer.submit({"mark": mark})
+    time.sleep(0.1)
+    assert len(serialise.written) == 1  # Still inside the interval
+    assert wait_until(lambda: len(serialise.written) == 2)
+    time.sleep(0.4)
+    assert serialise.written == [{"mark": 0}, {"mark": 49}]
+    assert read(path) == {"mark": 49}
+    writer.close()
+
+
+def test_flush_writes_the_latest_state_straight_away(tmp_path):
+    path = str(tmp_path / "saved_state.json")
+    serialise = CountingSerialise()
+    writer = CoalescingWriter(path, interval=60, serialise=serialise)
+    writer.submit({"mark": 1})
+    assert wait_until(lambda: len(serialise.written) == 1)
+    writer.submit({"mark": 2})
+    writer.submit({"mark": 3})
+
+    started = time.monotonic()
+    writer.flush()
+    assert time.monotonic() - started < 5
+    assert read(path) == {"mark": 3}
+    assert serialise.written == [{"mark": 1}, {"mark": 3}]
+    writer.close()
+
+
+def test_close_writes_the_last_state_and_stops(tmp_path):
+    path = str(tmp_path / "saved_state.json")
+    writer = CoalescingWriter(path, interval=60, serialise=CountingSerialise())
+    writer.submit({"mark": 1})
+    writer.submit({"mark": 2})
+    writer.close()
+    assert read(path) == {"mark": 2}
+    assert not writer.thread.is_alive()
+
+
+def test_failed_write_keeps_the_previous_file(tmp_path, capsys):
+    path = str(tmp_path / "saved_state.json")
+    writer = CoalescingWriter(path, interval=0, serialise=CountingSerialise())
+    writer.submit({"mark": 1})
+    writer.flush()
+    writer.submit("fail")
+    writer.flush()
+
+    assert read(path) == {"mark": 1}
+    assert os.listdir(tmp_path) == ["saved_state.json"]  # The temp file was removed
+    assert "Failed to save data" in capsys.readouterr().out
+
+    writer.submit({"mark": 2})  # Later saves still go through
+    writer.close()
+    assert read(path) == {"mark": 2}
@@ -0,0 +1,78 @@
+import random
+from datetime import date
+
+from calendar_journal import ShardedCalendar
+from helpers import feed, open_calendar, uni_tasks, vevent
+from ics_import import apply_changes, diff_events, index_uni_tasks, iter_vevents, merge_events
+
+
+def test_missing_index_re_adds_without_duplicates():
+    calendar_data = {}
+    events = [vevent("a", "20250305T090000", "20250305T100000"), vevent("b", "20250306T090000", "20250306T100000")]
+    merge_events(calendar_data, iter_vevents(feed(*events)))
+
+    index = {}  # e.g. the saved index was lost, every event looks new
+    delta = apply_changes(calendar_data, index, diff_events(index, iter_vevents(feed(*events))))
+    assert delta["added"] == 2
+    assert [uid for _day, uid, _text in uni_tasks(calendar_data)] == ["a", "b"]
+    assert index == index_uni_tasks(calendar_data)
+
+
+def test_diff_reads_no_months_and_apply_only_the_changed_ones(tmp_path):
+    events = [vevent(str(month), f"2025{month:02d}03T090000", f"2025{month:02d}03T100000") for month in range(1, 13)]
+    calendar = ShardedCalendar(str(tmp_path), resident_months=2).load()
+    calendar.uid_index = {}
+    with calendar.pinned():
+        delta = apply_changes(calendar, calendar.uid_index, diff_events({}, iter_vevents(feed(*events))))
+        for day in delta["days"]:
+            calendar.mark_dirty(day)
+    calendar.compact()
+
+    calendar = ShardedCalendar(str(tmp_path), resident_months=2).load()
+    index = calendar.read_uid_index()
+    events[4] = vevent("5", "20250503T090000", "20250503T100000", summary="Changed")
+    changes = diff_events(index, iter_vevents(feed(*events)))
+    assert calendar.months == {}
+    assert [key for key, *_rest in changes] == ["5"]
+
+    calendar.uid_index = index
+    delta = apply_changes(calendar, calendar.uid_index, changes)
+    assert (delta["changed"], delta["days"]) == (1, {date(2025, 5, 3)})
+    assert list(calendar.months) == ["05-2025"]
+
+
+def test_uid_index_is_saved_with_the_months(tmp_path):
+    calendar, _store = open_calendar(tmp_path)
+    assert calendar.read_uid_index() == {}
+    calendar.uid_index = {"a": [("03-2025", "05", "hash")]}
+    calendar["03-2025"] = {"05": [{"text": "a", "type": "uni", "uid": "a", "hash": "hash"}]}
+    calendar.compact()
+
+    calendar, _store = open_calendar(tmp_path)
+    assert calendar.read_uid_index() == {"a": [["03-2025", "05", "hash"]]}
+    (tmp_path / "calendar" / "uid_index.json").write_text("{broken")
+    assert calendar.read_uid_index() == {}
+
+
+def test_changes_applied_round_after_round_match_a_full_merge():
+    rng = random.Random(0)
+    events = {str(number): (f"202503{number % 28 + 1:02d}T0900", "COMP1511 Lecture") for number in range(40)}
+    calendar_data, index = {}, {}
+    for round_number in range(15):  # The feed changes a little between imports
+        for uid in rng.sample(sorted(events), 5):
+            events[uid] = (f"202504{rng.randrange(1, 29):02d}T1000", f"Moved {round_number}")
+        for uid in rng.sample(sorted(events), 3):
+            del events[uid]
+        for number in range(3):
+            events[f"new-{round_number}-{number}"] = (f"202503{rng.randrange(1, 29):02d}T1400", "Added")
+
+        def current_feed():
+            return iter_vevents(feed(*[vevent(uid, f"{start}00", f"{start}00", summary=summary)
+                                       for uid, (start, summary) in sorted(events.items())]))
+
+        apply_changes(calendar_data, index, diff_events(index, current_feed()))
+        fresh = {}
+        merge_events(fresh, current_feed())
+        assert uni_tasks(calendar_data) == uni_tasks(fresh)
+        assert index == index_uni_tasks(calendar_data)
+
@@ -0,0 +1,49 @@
+import json
+import multiprocessing
+import os
+
+import pytest
+
+import batch_export
+
+
+def fake_run_job(job):  # Kills its worker process for the "crash" source, like running out of memory would
+    if job["source"] == "crash":
+        os._exit(1)
+    return {"source": job["source"], "week": job["week"], "output": job["output"], "ok": True, "seconds": 0.0}
+
+
+@pytest.mark.skipif(multiprocessing.get_start_method() != "fork", reason="workers must inherit the patched run_job")
+def test_dead_worker_only_fails_its_own_job(monkeypatch):
+    monkeypatch.setattr(batch_export, "run_job", fake_run_job)
+    jobs = [{"source": source, "week": "2025-03-03", "output": f"{source}.xlsx"} for source in ("a", "crash", "b", "c")]
+
+    results = batch_export.run_batch(jobs, workers=2)
+    assert [result["ok"] for result in results] == [True, False, True, True]
+    assert results[1]["output"] == "crash.xlsx" and results[1]["error"].startswith("BrokenProcessPool")
+
+
+def test_failed_export_is_reported_per_job(tmp_path):
+    feed = tmp_path / "feed.ics"
+    feed.write_bytes(b"BEGIN:VCALENDAR\r\nBEGIN:VEVENT\r\nUID:1\r\nDTSTART:20250305T090000\r\n"
+                     b"DURATION:PT1H\r\nSUMMARY:Lecture\r\nEND:VEVENT\r\nEND:VCALENDAR\r\n")
+    jobs = [{"source": str(feed), "week": "2025-03-03", "output": str(tmp_path / "ok.xlsx")},
+            {"source": str(tmp_path / "missing.ics"), "week": "2025-03-03", "output": str(tmp_path / "no.xlsx")}]
+
+    results = batch_export.run_batch(jobs, workers=2)
+    assert [result["ok"] for result in results] == [True, False]
+    assert os.path.exists(tmp_path / "ok.xlsx")
+    assert results[1]["error"].startswith("FileNotFoundError")
+
+
+def test_manifest_reads_json_and_csv_and_names_missing_fields(tmp_path):
+    jobs = [{"source": "a.ics", "week": "2025-03-03", "output": "a.xlsx"},
+            {"source": "b.ics", "week": "2025-03-10", "output": "b.xlsx"}]
+    (tmp_path / "jobs.json").write_text(json.dumps(jobs))
+    (tmp_path / "jobs.csv").write_text("source,week,output\na.ics,2025-03-03,a.xlsx\nb.ics,2025-03-10,b.xlsx\n")
+    assert batch_export.load_manifest(str(tmp_path / "jobs.json")) == jobs
+    assert batch_export.load_manifest(str(tmp_path / "jobs.csv")) == jobs
+
+    (tmp_path / "broken.csv").write_text("source,week,output\na.ics,2025-03-03,a.xlsx\nb.ics,,\n")
+    with pytest.raises(ValueError, match="job 2 .* is missing week, output"):
+        batch_export.load_manifest(str(tmp_path / "broken.csv"))
@@ -0,0 +1,80 @@
+import hashlib
+import json
+from datetime import date
+
+from calendar_journal import JOURNAL_FILE, LEGACY_JOURNAL_FILE, LEGACY_SNAPSHOT_FILE
+from helpers import open_calendar, task, texts
+
+
+def test_journalled_changes_survive_a_restart_without_compaction(tmp_path):
+    calendar, store = open_calendar(tmp_path)
+    store.add_task(date(2025, 3, 5), task("a"))
+    store.add_task(date(2025, 3, 5), task("b"))
+    store.remove_task(date(2025, 3, 5), calendar["03-2025"]["05"][0])
+    store.add_task(date(2025, 4, 1), task("c"))
+    calendar.close()  # No compaction, as if the app was killed
+
+    calendar, _store = open_calendar(tmp_path)
+    assert texts(calendar, "03-2025", "05") == ["b"]
+    assert texts(calendar, "04-2025", "01") == ["c"]
+    assert sorted(calendar) == ["03-2025", "04-2025"]
+
+
+def test_torn_journal_line_keeps_the_changes_before_it(tmp_path):
+    calendar, store = open_calendar(tmp_path)
+    store.add_task(date(2025, 3, 5), task("a"))
+    store.add_task(date(2025, 3, 5), task("b"))
+    calendar.close()
+    with open(tmp_path / "calendar" / JOURNAL_FILE, "ab") as file:
+        file.write(b'{"op": "add", "date": "2025-03-05", "ta')  # Cut off mid-write
+
+    calendar, _store = open_calendar(tmp_path)
+    assert texts(calendar, "03-2025", "05") == ["a", "b"]
+    with open(tmp_path / "calendar" / JOURNAL_FILE, "rb") as file:
+        assert len(file.read().splitlines()) == 1  # Compacted on load, only the header is left
+
+    calendar, _store = open_calendar(tmp_path)
+    assert texts(calendar, "03-2025", "05") == ["a", "b"]
+
+
+def test_compaction_after_many_changes(tmp_path):
+    calendar, store = open_calendar(tmp_path, compact_after=3)
+    for number in range(7):
+        store.add_task(date(2025, 3, 5), task(str(number)))
+    assert calendar.changes == 1
+    calendar.close()
+
+    calendar, _store = open_calendar(tmp_path)
+    assert texts(calendar, "03-2025", "05") == [str(number) for number in range(7)]
+
+
+def test_legacy_snapshot_and_journal_are_migrated(tmp_path):
+    content = json.dumps({"03-2025": {"05": [{"text": "old", "type": "other", "start_time": "09:00",
+                                              "end_time": "10:00"}]}}).encode()
+    (tmp_path / LEGACY_SNAPSHOT_FILE).write_bytes(content)
+    with open(tmp_path / LEGACY_JOURNAL_FILE, "w") as file:
+        file.write(json.dumps({"base": hashlib.sha1(content).hexdigest()}) + "\n")
+        file.write(json.dumps({"op": "add", "date": "2025-03-05", "task": task("new")}) + "\n")
+
+    calendar, _store = open_calendar(tmp_path)
+    assert texts(calendar, "03-2025", "05") == ["old", "new"]
+    assert calendar["03-2025"]["05"][0]["start_minutes"] == 540
+    assert (tmp_path / (LEGACY_SNAPSHOT_FILE + ".bak")).exists()
+    assert not (tmp_path / LEGACY_JOURNAL_FILE).exists()
+
+
+def test_a_change_appends_one_line_and_leaves_the_month_files_alone(tmp_path):
+    calendar, store = open_calendar(tmp_path)
+    for number in range(200):
+        store.add_task(date(2025, 3, 1 + number % 28), task(str(number)))
+    calendar.compact()
+    folder = tmp_path / "calendar"
+    month_file = (folder / "03-2025.json").stat()
+    journal_size = (folder / JOURNAL_FILE).stat().st_size
+
+    store.add_task(date(2025, 3, 5), task("new"))
+    journal = (folder / JOURNAL_FILE).read_bytes()
+    assert len(journal) - journal_size == len(json.dumps({"op": "add", "date": "2025-03-05",
+                                                          "task": task("new")}).encode()) + 1
+    assert (folder / "03-2025.json").stat().st_mtime_ns == month_file.st_mtime_ns
+    calendar.close()
@@ -0,0 +1,51 @@
+import random
+from datetime import date
+
+import pytest
+
+from calendar_store import CalendarStore
+
+DAY = date(2025, 3, 5)
+
+
+def timed(text, start, end):
+    return {"text": text, "type": "other", "start_minutes": start, "end_minutes": end}
+
+
+def test_overlapping_tasks_at_the_edges_of_the_range():
+    store = CalendarStore()
+    for task in [timed("Long", 0, 600), timed("Ends at start", 500, 540), timed("At start", 540, 540),
+                 timed("Inside", 560, 580), timed("At end", 600, 600), timed("Starts at end", 600, 660)]:
+        store.add_task(DAY, task)
+
+    assert [task["text"] for task in store.tasks_overlapping(DAY, 540, 600)] == ["Long", "At start", "Inside"]
+    assert [task["text"] for task in store.tasks_overlapping(DAY, 600, 601)] == ["At end", "Starts at end"]
+    assert store.tasks_overlapping(date(2025, 3, 6), 0, 1440) == []
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_overlapping_tasks_match_a_full_scan(seed):
+    rng = random.Random(seed)
+    store = CalendarStore()
+    tasks = []
+    for number in range(40):
+        start = rng.randrange(0, 24 * 60, 15)
+        tasks.append(timed(str(number), start, start + rng.choice([0, 0, 15, 60, 90, 600])))
+        store.add_task(DAY, tasks[-1])
+
+    for _ in range(50):
+        start = rng.randrange(0, 24 * 60, 15)
+        end = start + rng.choice([1, 15, 30, 120])
+        expected = [task for task in tasks
+                    if task["start_minutes"] < end and max(task["end_minutes"], task["start_minutes"] + 1) > start]
+        found = store.tasks_overlapping(DAY, start, end)
+        assert sorted(task["text"] for task in found) == sorted(task["text"] for task in expected)
+
+
+def test_index_follows_added_and_removed_tasks():
+    store = CalendarStore()
+    lecture = timed("Lecture", 540, 600)
+    store.add_task(DAY, lecture)
+    assert store.tasks_overlapping(DAY, 550, 560) == [lecture]
+    store.remove_task(DAY, lecture)
+    assert store.tasks_overlapping(DAY, 550, 560) == []
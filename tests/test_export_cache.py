@@ -0,0 +1,64 @@
+import os
+
+from export_cache import MAX_CACHED_EXPORTS, cached_export_week, prune_export_cache
+from helpers import timed, week_store
+from timetable_export import StyleRegistry
+
+
+def cached(cache_dir):
+    return sorted(os.listdir(cache_dir))
+
+
+def test_unchanged_week_reuses_the_cached_workbook(tmp_path):
+    store, week_dates = week_store()
+    cache_dir, output = str(tmp_path / "cache"), str(tmp_path / "Timetable.xlsx")
+    assert cached_export_week(store, week_dates, output, cache_dir) is False
+    (workbook,) = cached(cache_dir)
+    os.remove(output)
+
+    assert cached_export_week(store, week_dates, output, cache_dir) is True
+    with open(output, "rb") as exported, open(os.path.join(cache_dir, workbook), "rb") as cached_file:
+        assert exported.read() == cached_file.read()
+    assert cached(cache_dir) == [workbook]
+
+
+def test_tasks_styles_and_slot_length_each_make_a_new_workbook(tmp_path):
+    store, week_dates = week_store()
+    cache_dir, output = str(tmp_path / "cache"), str(tmp_path / "Timetable.xlsx")
+    cached_export_week(store, week_dates, output, cache_dir)
+
+    store.add_task(week_dates[4], timed("Friday Lecture", 540, 600))
+    assert cached_export_week(store, week_dates, output, cache_dir) is False
+    assert cached_export_week(store, week_dates, output, cache_dir, StyleRegistry(font_size=14)) is False
+    assert cached_export_week(store, week_dates, output, cache_dir, slot_minutes=30) is False
+    assert len(cached(cache_dir)) == 4
+
+    store.add_task(week_dates[5], timed("Saturday Lecture", 540, 600))  # Weekends aren't exported
+    assert cached_export_week(store, week_dates, output, cache_dir, slot_minutes=30) is True
+
+
+def test_pruning_keeps_the_most_recently_used_workbooks(tmp_path):
+    for number in range(MAX_CACHED_EXPORTS + 3):
+        path = tmp_path / f"{number:02d}.xlsx"
+        path.write_bytes(b"")
+        os.utime(path, (1000 + number, 1000 + number))
+    (tmp_path / "notes.txt").write_text("not a workbook")
+
+    prune_export_cache(str(tmp_path))
+    assert cached(tmp_path) == [f"{number:02d}.xlsx" for number in range(3, MAX_CACHED_EXPORTS + 3)] + ["notes.txt"]
+
+
+def test_a_cache_hit_counts_as_recent_use(tmp_path):
+    store, week_dates = week_store()
+    cache_dir, output = tmp_path / "cache", str(tmp_path / "Timetable.xlsx")
+    cached_export_week(store, week_dates, output, str(cache_dir))
+    (workbook,) = cached(cache_dir)
+    os.utime(cache_dir / workbook, (0, 0))  # Exported long ago
+    for number in range(MAX_CACHED_EXPORTS - 1):
+        (cache_dir / f"other-{number}.xlsx").write_bytes(b"")
+
+    cached_export_week(store, week_dates, output, str(cache_dir))  # Hit, so it is now the newest
+    store.add_task(week_dates[4], timed("Friday Lecture", 540, 600))
+    cached_export_week(store, week_dates, output, str(cache_dir))  # One more than the cache keeps
+    assert workbook in cached(cache_dir)
+    assert len(cached(cache_dir)) == MAX_CACHED_EXPORTS
@@ -0,0 +1,74 @@
+import os
+
+import pytest
+import requests
+
+from feed_cache import CACHE_BODY_FILE, clear_feed_cache, fetch_feed, save_feed_validators
+from helpers import serve_feeds
+
+FEED = b"BEGIN:VCALENDAR\r\nVERSION:2.0\r\nEND:VCALENDAR\r\n"
+
+
+@pytest.fixture
+def server():
+    server, base_url = serve_feeds({"/feed.ics": FEED})
+    server.base_url = base_url
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def read(path):
+    with open(path, "rb") as file:
+        return file.read()
+
+
+def test_validators_only_count_once_saved(tmp_path, server):
+    cache_dir, feed_url = str(tmp_path / "cache"), f"{server.base_url}/feed.ics"
+    body_path, validators = fetch_feed(feed_url, cache_dir)
+    assert read(body_path) == FEED
+    assert validators["url"] == feed_url and validators["etag"]
+
+    # The import was never saved, e.g. the app closed first, so the feed must be downloaded again
+    assert fetch_feed(feed_url, cache_dir) is not None
+    assert "If-None-Match" not in server.requests[-1]
+
+    save_feed_validators(cache_dir, validators)
+    assert fetch_feed(feed_url, cache_dir) is None
+    assert server.requests[-1]["If-None-Match"] == validators["etag"]
+
+
+def test_changed_feed_is_downloaded_again(tmp_path, server):
+    cache_dir, feed_url = str(tmp_path / "cache"), f"{server.base_url}/feed.ics"
+    save_feed_validators(cache_dir, fetch_feed(feed_url, cache_dir)[1])
+
+    server.feeds["/feed.ics"] = FEED.replace(b"VERSION:2.0", b"VERSION:2.0\r\nX-WR-CALNAME:Term 2")
+    body_path, validators = fetch_feed(feed_url, cache_dir)
+    assert read(body_path) == server.feeds["/feed.ics"]
+    assert validators["etag"] != server.requests[-1]["If-None-Match"]
+
+
+def test_validators_of_another_link_are_not_used(tmp_path, server):
+    cache_dir, feed_url = str(tmp_path / "cache"), f"{server.base_url}/feed.ics"
+    _body_path, validators = fetch_feed(feed_url, cache_dir)
+    save_feed_validators(cache_dir, dict(validators, url="https://example.com/old.ics"))
+    assert fetch_feed(feed_url, cache_dir) is not None
+    assert "If-None-Match" not in server.requests[-1]
+
+
+def test_failed_download_keeps_the_cached_feed(tmp_path, server):
+    cache_dir, feed_url = str(tmp_path / "cache"), f"{server.base_url}/feed.ics"
+    save_feed_validators(cache_dir, fetch_feed(feed_url, cache_dir)[1])
+    del server.feeds["/feed.ics"]
+
+    with pytest.raises(requests.HTTPError):
+        fetch_feed(feed_url, cache_dir)
+    assert read(os.path.join(cache_dir, CACHE_BODY_FILE)) == FEED
+
+
+def test_cleared_cache_downloads_unconditionally(tmp_path, server):
+    cache_dir, feed_url = str(tmp_path / "cache"), f"{server.base_url}/feed.ics"
+    save_feed_validators(cache_dir, fetch_feed(feed_url, cache_dir)[1])
+    clear_feed_cache(cache_dir)
+    assert fetch_feed(feed_url, cache_dir) is not None
+    assert "If-None-Match" not in server.requests[-1]
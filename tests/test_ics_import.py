@@ -0,0 +1,75 @@
+from datetime import date
+
+from helpers import feed, uni_tasks, vevent
+from ics_import import clean_location, iter_vevents, merge_events
+
+
+def test_merge_adds_changes_and_removes_by_uid():
+    calendar_data = {"03-2025": {"05": [{"text": "Gym", "type": "other"}]}}
+    delta = merge_events(calendar_data, iter_vevents(feed(
+        vevent("a", "20250305T090000", "20250305T100000"),
+        vevent("b", "20250306T090000", "20250306T100000"),
+        vevent("c", "20250307T090000", "20250307T100000")
+    )))
+    assert (delta["added"], delta["changed"], delta["removed"]) == (3, 0, 0)
+    assert delta["days"] == {date(2025, 3, 5), date(2025, 3, 6), date(2025, 3, 7)}
+
+    unchanged = merge_events(calendar_data, iter_vevents(feed(
+        vevent("a", "20250305T090000", "20250305T100000"),
+        vevent("b", "20250306T090000", "20250306T100000"),
+        vevent("c", "20250307T090000", "20250307T100000")
+    )))
+    assert (unchanged["added"], unchanged["changed"], unchanged["removed"], unchanged["days"]) == (0, 0, 0, set())
+
+    delta = merge_events(calendar_data, iter_vevents(feed(
+        vevent("a", "20250305T090000", "20250305T100000"),
+        vevent("b", "20250410T090000", "20250410T100000", summary="Moved")
+    )))
+    assert (delta["added"], delta["changed"], delta["removed"]) == (0, 1, 1)
+    assert delta["days"] == {date(2025, 3, 6), date(2025, 4, 10), date(2025, 3, 7)}
+    assert uni_tasks(calendar_data) == [("05-03-2025", "a", "COMP1511 Lecture"), ("10-04-2025", "b", "Moved")]
+    assert calendar_data["03-2025"]["05"][0] == {"text": "Gym", "type": "other"}  # Other tasks are never touched
+
+
+def test_empty_feed_keeps_the_saved_tasks():
+    calendar_data = {}
+    merge_events(calendar_data, iter_vevents(feed(vevent("a", "20250305T090000", "20250305T100000"))))
+    delta = merge_events(calendar_data, iter_vevents(feed()))
+    assert delta["removed"] == 0
+    assert len(uni_tasks(calendar_data)) == 1
+
+
+def test_repeated_and_missing_uids_are_told_apart_by_start():
+    calendar_data = {}
+    merge_events(calendar_data, iter_vevents(feed(
+        vevent("a", "20250305T090000", "20250305T100000"),
+        vevent("a", "20250312T090000", "20250312T100000"),
+        vevent("", "20250306T090000", "20250306T100000")
+    )))
+    assert [uid for _day, uid, _text in uni_tasks(calendar_data)] == ["a", "@20250306T0900", "a@20250312T0900"]
+
+
+def test_tasks_saved_without_a_uid_are_replaced():
+    calendar_data = {"03-2025": {"05": [{"text": "Old import", "type": "uni", "start_minutes": 540,
+                                         "end_minutes": 600}]}}
+    delta = merge_events(calendar_data, iter_vevents(feed(vevent("a", "20250305T090000", "20250305T100000"))))
+    assert delta["removed"] == 1
+    assert uni_tasks(calendar_data) == [("05-03-2025", "a", "COMP1511 Lecture")]
+
+
+def test_time_or_location_changes_replace_the_task_in_place():
+    calendar_data = {}
+    merge_events(calendar_data, iter_vevents(feed(vevent("a", "20250305T090000", "20250305T100000"))))
+    delta = merge_events(calendar_data, iter_vevents(feed(
+        vevent("a", "20250305T093000", "20250305T103000", location="K-J17-101.Ainsworth 101 (1-10\\, 12)")
+    )))
+    assert (delta["added"], delta["changed"], delta["removed"]) == (0, 1, 0)
+    (task,) = calendar_data["03-2025"]["05"]
+    assert (task["start_minutes"], task["end_minutes"], task["location"]) == (570, 630, "K-J17-101 Ainsworth 101")
+
+
+def test_locations_are_shortened():
+    assert clean_location("K-E19-G05.Central Lecture Block 7 (1-5, 7-10)") == "K-E19-G05 Central Lecture Block 7"
+    assert clean_location(" - ") == "(Online)"
+    assert clean_location("") == "No location"
+
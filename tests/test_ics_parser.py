@@ -0,0 +1,48 @@
+import io
+from datetime import datetime
+
+from helpers import feed, vevent
+from ics_import import iter_vevents
+
+
+def test_reads_the_kept_properties():
+    events = list(iter_vevents(feed(vevent("1", "20250305T103000", "20250305T113000", summary="Half Tutorial"))))
+    assert events == [{"name": "Half Tutorial", "begin": datetime(2025, 3, 5, 10, 30),
+                       "end": datetime(2025, 3, 5, 11, 30), "location": "K-E19-G05.Central Lecture Block 7", "uid": "1"}]
+
+
+def test_unfolds_lines_and_keeps_split_multibyte_characters():
+    summary = "x" * 66 + "é and more"  # After "SUMMARY:" and 66 characters the é is bytes 74 and 75
+    encoded = f"SUMMARY:{summary}".encode("utf-8")
+    folded = encoded[:75] + b"\r\n " + encoded[75:]  # The fold falls inside the two bytes of an é
+    assert encoded[74:76] == "é".encode("utf-8")
+    raw = (b"BEGIN:VCALENDAR\r\nBEGIN:VEVENT\r\nUID:1\r\nDTSTART:20250305T090000\r\n" + folded +
+           b"\r\nEND:VEVENT\r\nEND:VCALENDAR\r\n")
+    assert [event["name"] for event in iter_vevents(io.BytesIO(raw))] == [summary]
+
+
+def test_unescapes_text_and_ignores_nested_components():
+    alarm = "BEGIN:VALARM\r\nACTION:DISPLAY\r\nSUMMARY:Reminder\r\nDESCRIPTION:Alarm\r\nEND:VALARM\r\n"
+    event = vevent("1", "20250305T090000", "20250305T100000", summary="Lab\\, part 1\\; bring\\nlaptop", extra=alarm)
+    (parsed,) = iter_vevents(feed(event))
+    assert parsed["name"] == "Lab, part 1; bring\nlaptop"
+
+
+def test_duration_sets_the_end_when_there_is_no_dtend():
+    events = list(iter_vevents(feed(
+        vevent("1", "20250305T103000", extra="DURATION:PT1H30M\r\n"),
+        vevent("2", "20250306T090000", "20250306T100000", extra="DURATION:PT5H\r\n"),  # DTEND wins
+        vevent("3", "20250307T090000")
+    )))
+    assert [event["end"] for event in events] == [datetime(2025, 3, 5, 12, 0), datetime(2025, 3, 6, 10, 0),
+                                                   datetime(2025, 3, 7, 9, 0)]
+
+
+def test_events_are_streamed_one_at_a_time():
+    lines = feed(vevent("1", "20250305T090000", "20250305T100000")).read().splitlines(keepends=True)  # One line ahead
+
+    def lines_then_fail():
+        yield from lines
+        raise AssertionError("read past the first event")
+
+    assert next(iter_vevents(lines_then_fail()))["uid"] == "1"
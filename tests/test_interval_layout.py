@@ -0,0 +1,108 @@
+import random
+from itertools import combinations
+
+import pytest
+
+from helpers import week_store
+from interval_layout import column_spans, partition_intervals
+from timetable_export import plan_week
+
+
+def overlaps(a, b):  # Zero length intervals take up their start, like in partition_intervals
+    return a[0] < max(b[1], b[0] + 1) and b[0] < max(a[1], a[0] + 1)
+
+
+def most_overlapping(intervals):
+    points = {start for start, _end in intervals}
+    return max((sum(start <= point < max(end, start + 1) for start, end in intervals) for point in points), default=0)
+
+
+def random_intervals(rng, count):
+    intervals = []
+    for _ in range(count):
+        start = rng.randrange(0, 48)
+        intervals.append((start, start + rng.choice([0, 1, 2, 3, 6])))
+    return intervals
+
+
+@pytest.mark.parametrize("seed", range(50))
+def test_partition_uses_the_fewest_columns_without_clashes(seed):
+    intervals = random_intervals(random.Random(seed), 30)
+    columns, width = partition_intervals(intervals)
+
+    assert width == most_overlapping(intervals)
+    assert all(0 <= column < width for column in columns)
+    for i, j in combinations(range(len(intervals)), 2):
+        if columns[i] == columns[j]:
+            assert not overlaps(intervals[i], intervals[j])
+
+
+@pytest.mark.parametrize("seed", range(50))
+def test_spans_only_cover_free_columns(seed):
+    intervals = random_intervals(random.Random(seed), 20)
+    columns, width = partition_intervals(intervals)
+    spans = column_spans(intervals, columns, width)
+
+    for i, span in enumerate(spans):
+        assert 1 <= span and columns[i] + span <= width
+        covered = range(columns[i], columns[i] + span)
+        for j in range(len(intervals)):
+            if j != i and columns[j] in covered:
+                assert not overlaps(intervals[i], intervals[j])
+
+
+def test_partition_edge_cases():
+    assert partition_intervals([]) == ([], 0)
+    assert partition_intervals([(1, 2), (2, 3)]) == ([0, 0], 1)  # Touching intervals share a column
+    assert partition_intervals([(5, 5), (5, 5)]) == ([0, 1], 2)  # Zero length intervals still clash at their start
+
+
+def test_spans_stop_at_zero_length_clashes():
+    intervals = [(3, 6), (3, 3)]  # A task and a zero length task at its start
+    columns, width = partition_intervals(intervals)
+    assert (columns, width) == ([0, 1], 2)
+    assert column_spans(intervals, columns, width) == [1, 1]  # The task can't widen over the zero length one
+
+    intervals = [(0, 4), (5, 5), (6, 9)]  # Nothing clashes, each interval has the only column
+    assert column_spans(intervals, *partition_intervals(intervals)) == [1, 1, 1]
+
+
+def cells(merged_range):
+    min_row, min_col, max_row, max_col = merged_range
+    return {(row, col) for row in range(min_row, max_row + 1) for col in range(min_col, max_col + 1)}
+
+
+def assert_valid_plan(plan):
+    seen = set()
+    for merged_range in plan["merges"]:
+        merged_cells = cells(merged_range)
+        assert not merged_cells & seen, f"{merged_range} overlaps another merged range"
+        seen |= merged_cells
+        assert 1 <= merged_range[0] <= merged_range[2] <= plan["last_row"]
+        assert 2 <= merged_range[1] <= merged_range[3] <= plan["last_column"]
+
+    for day in plan["days"]:
+        day_columns = range(day["first_column"], day["first_column"] + day["width"])
+        for event in day["events"]:
+            assert event["column"] in day_columns and event["column"] + event["span"] - 1 in day_columns
+            assert plan["cells"][(event["start_row"], event["column"])] is event
+
+
+def test_plan_puts_clashes_side_by_side():
+    store, week_dates = week_store()
+    plan = plan_week(store, week_dates)
+    assert_valid_plan(plan)
+
+    monday = plan["days"][0]
+    assert [day["name"] for day in plan["days"]] == ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday"]
+    assert monday["width"] == 3  # Lecture, Tutorial and Lab all run at 10:30
+    assert [event["column"] for event in monday["events"]] == [2, 3, 4]
+    assert plan["days"][1]["first_column"] == 5
+    assert [event["task"]["text"] for event in plan["days"][2]["events"]] == ["Half Tutorial"]  # 9:30pm is off the grid
+
+
+@pytest.mark.parametrize("slot_minutes", [60, 30, 15])
+@pytest.mark.parametrize("seed", range(10))
+def test_plan_never_overlaps_merged_ranges(slot_minutes, seed):
+    store, week_dates = week_store(random.Random(seed))
+    assert_valid_plan(plan_week(store, week_dates, slot_minutes=slot_minutes))
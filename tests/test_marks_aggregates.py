@@ -0,0 +1,80 @@
+import pytest
+
+from marks_aggregates import MarksAggregates, calculate_marks, row_contribution
+
+
+def test_row_contribution_skips_incomplete_and_non_finite_rows(capsys):
+    assert row_contribution(" 80 ", "6") == (480.0, 6.0)
+    for mark_text, credit_text in [("", "6"), ("80", " "), (".", "6"), ("80", "."), ("nan", "6"), ("80", "inf")]:
+        assert row_contribution(mark_text, credit_text) is None
+    assert capsys.readouterr().out == ""  # Called on every keystroke, half typed numbers aren't errors
+
+
+def test_grades_at_the_boundaries():
+    assert calculate_marks(0, 0) == (0, "F", 0.0, 0.0)
+    assert calculate_marks(6, 6 * 85) == (85.0, "HD", 4.0, 7.0)
+    assert calculate_marks(6, 6 * 84.99) == (84.99, "D", 3.5, 6.0)
+    assert calculate_marks(6, 6 * 50) == (50.0, "P", 2.0, 4.0)
+
+
+def test_semester_and_degree_totals():
+    marks = MarksAggregates()
+    marks.set_row("a", "Term 1", "90", "6")
+    marks.set_row("b", "Term 1", "70", "12")
+    marks.set_row("c", "Term 2", "60", "6")
+
+    assert marks.semester_marks("Term 1")[0] == pytest.approx((90 * 6 + 70 * 12) / 18, abs=0.01)
+    assert marks.semester_marks("Term 2") == calculate_marks(6, 360)
+    assert marks.degree_marks()[0] == pytest.approx((90 * 6 + 70 * 12 + 60 * 6) / 24, abs=0.01)
+    assert marks.semester_marks("Term 3") == calculate_marks(0, 0)
+
+
+def test_replacing_a_row_only_counts_its_new_values():
+    marks = MarksAggregates()
+    marks.set_row("a", "Term 1", "50", "6")
+    marks.set_row("b", "Term 1", "70", "6")
+    marks.set_row("a", "Term 1", "90", "6")
+    assert marks.semester_marks("Term 1")[:2] == (80.0, "D")
+
+    marks.set_row("a", "Term 1", "9", "")  # Cleared credit, the row stops counting until it is complete again
+    assert marks.semester_marks("Term 1")[:2] == (70.0, "C")
+    assert "a" not in marks.rows
+
+
+def test_removing_every_row_resets_the_totals_exactly():
+    marks = MarksAggregates()
+    for number in range(100):
+        marks.set_row(number, "Term 1", str(50 + number * 0.37), "6.1")
+    for number in range(100):
+        marks.remove_row(number)
+    marks.remove_row("never added")
+
+    assert (marks.degree.weight, marks.degree.credits, marks.degree.rows) == (0.0, 0.0, 0)
+    assert (marks.semesters["Term 1"].weight, marks.semesters["Term 1"].credits) == (0.0, 0.0)
+    assert marks.degree_marks() == calculate_marks(0, 0)
+
+
+def test_matches_a_full_recalculation_after_many_edits():
+    marks = MarksAggregates()
+    rows = {}
+    for step in range(500):
+        row_key, semester = step % 17, f"Term {step % 17 % 3}"
+        mark_text, credit_text = str((step * 37) % 101), str(step % 4 * 6)
+        marks.set_row(row_key, semester, mark_text, credit_text)
+        rows[row_key] = (semester, float(mark_text), float(credit_text))
+
+    for semester in ("Term 0", "Term 1", "Term 2"):
+        counted = [(mark, credit) for row_semester, mark, credit in rows.values() if row_semester == semester]
+        assert marks.semester_marks(semester) == calculate_marks(sum(credit for _mark, credit in counted),
+                                                                 sum(mark * credit for mark, credit in counted))
+    assert marks.degree_marks() == calculate_marks(sum(credit for _s, _m, credit in rows.values()),
+                                                   sum(mark * credit for _s, mark, credit in rows.values()))
+
+
+def test_clear_forgets_every_row():
+    marks = MarksAggregates()
+    marks.set_row("a", "Term 1", "90", "6")
+    marks.clear()
+    assert marks.rows == {} and marks.degree_marks() == calculate_marks(0, 0)
+    marks.set_row("a", "Term 1", "60", "6")
+    assert marks.semester_marks("Term 1")[0] == 60.0
@@ -0,0 +1,119 @@
+import os
+from datetime import date
+
+import pytest
+
+import calendar_journal
+from calendar_journal import JOURNAL_FILE
+from helpers import open_calendar, task, texts
+
+
+@pytest.mark.parametrize("crash_at", ["manifest", "journal"])
+def test_interrupted_compaction_applies_nothing_twice(tmp_path, monkeypatch, crash_at):
+    calendar, store = open_calendar(tmp_path)
+    store.add_task(date(2025, 3, 5), task("a"))
+    calendar.compact()
+    store.add_task(date(2025, 3, 5), task("b"))
+    store.remove_task(date(2025, 3, 5), calendar["03-2025"]["05"][0])
+    store.add_task(date(2025, 3, 6), task("c"))
+
+    real_atomic_write = calendar_journal.atomic_write
+
+    def crash(path, data):
+        if os.path.basename(path) == (calendar_journal.MANIFEST_FILE if crash_at == "manifest" else JOURNAL_FILE):
+            raise OSError("power cut")
+        real_atomic_write(path, data)
+
+    monkeypatch.setattr(calendar_journal, "atomic_write", crash)
+    with pytest.raises(OSError):
+        calendar.compact()  # Month files are written under the new generation, the journal still has the changes
+    store.add_task(date(2025, 3, 5), task("d"))  # The app carries on after the failed save
+    calendar.close()
+    monkeypatch.setattr(calendar_journal, "atomic_write", real_atomic_write)
+
+    calendar, store = open_calendar(tmp_path)
+    assert texts(calendar, "03-2025", "05") == ["b", "d"]
+    assert texts(calendar, "03-2025", "06") == ["c"]
+    store.add_task(date(2025, 3, 6), task("e"))
+    calendar.close()
+
+    calendar, _store = open_calendar(tmp_path)
+    assert texts(calendar, "03-2025", "05") == ["b", "d"]
+    assert texts(calendar, "03-2025", "06") == ["c", "e"]
+
+
+def test_crash_during_compaction_keeps_changes_made_after_the_restart(tmp_path, monkeypatch):
+    calendar, store = open_calendar(tmp_path)
+    store.add_task(date(2025, 3, 5), task("a"))
+    calendar.compact()
+    store.add_task(date(2025, 3, 5), task("b"))
+    real_save_as = calendar_journal.save_as
+
+    def crash(stem, data):  # Power cut after the month file, before the manifest
+        real_save_as(stem, data)
+        raise OSError("power cut")
+
+    monkeypatch.setattr(calendar_journal, "save_as", crash)
+    with pytest.raises(OSError):
+        calendar.compact()
+    monkeypatch.setattr(calendar_journal, "save_as", real_save_as)
+
+    calendar, store = open_calendar(tmp_path)
+    assert texts(calendar, "03-2025", "05") == ["a", "b"]
+    store.add_task(date(2025, 3, 5), task("c"))
+    calendar.close()
+
+    calendar, _store = open_calendar(tmp_path)
+    assert texts(calendar, "03-2025", "05") == ["a", "b", "c"]
+
+
+
+def test_month_files_older_than_the_journal_get_its_changes(tmp_path):
+    calendar, store = open_calendar(tmp_path)
+    store.add_task(date(2025, 3, 5), task("a"))
+    calendar.compact()
+    store.update_task(date(2025, 3, 5), calendar["03-2025"]["05"][0], {"text": "renamed"})
+    calendar.close()
+
+    calendar, _store = open_calendar(tmp_path)
+    assert texts(calendar, "03-2025", "05") == ["renamed"]
+
+
+def test_dirty_months_are_not_evicted_before_they_are_saved(tmp_path):
+    calendar, _store = open_calendar(tmp_path, resident_months=2)
+    for month in range(1, 6):
+        calendar[f"{month:02d}-2025"] = {"01": [task(str(month))]}
+    assert len(calendar.months) == 5
+
+    calendar.compact()
+    assert len(calendar.months) == 2
+    calendar, _store = open_calendar(tmp_path, resident_months=2)
+    assert [texts(calendar, f"{month:02d}-2025", "01") for month in range(1, 6)] == [["1"], ["2"], ["3"], ["4"], ["5"]]
+    assert len(calendar.months) == 2
+
+
+def test_stray_temp_files_are_not_months(tmp_path):
+    calendar, _store = open_calendar(tmp_path)
+    calendar["03-2025"] = {"05": [task("a")]}
+    calendar.compact()
+    folder = tmp_path / "calendar"
+    (folder / ".tmp-abcd03-2025.json").write_text("{")  # Left by a save cut off by a crash
+    (folder / "notes.json").write_text("{}")
+
+    calendar, _store = open_calendar(tmp_path)
+    assert list(calendar) == ["03-2025"]
+    assert not (folder / ".tmp-abcd03-2025.json").exists()
+    assert dict(calendar.items()) == {"03-2025": {"05": [task("a")]}}
+
+
+def test_corrupt_month_file_is_set_aside(tmp_path):
+    calendar, _store = open_calendar(tmp_path)
+    calendar["03-2025"] = {"05": [task("a")]}
+    calendar["04-2025"] = {"01": [task("b")]}
+    calendar.compact()
+    (tmp_path / "calendar" / "04-2025.json").write_text("{broken")
+
+    calendar, _store = open_calendar(tmp_path)
+    assert calendar["04-2025"] == {}
+    assert texts(calendar, "03-2025", "05") == ["a"]
+    assert (tmp_path / "calendar" / "04-2025.json.corrupt").exists()
@@ -0,0 +1,66 @@
+import os
+from datetime import date
+
+import pytest
+
+import serialisation
+from calendar_journal import JOURNAL_FILE
+from helpers import open_calendar, task, texts
+from serialisation import FORMATS, dumps, find, load, loads, path_for, save_as
+
+STATE = {"03-2025": {"05": [{"text": "Café ☕", "start_minutes": 540, "done": False, "location": None}]},
+         "ics_url": "https://example.com/feed.ics", "marks": [85.5, 6]}
+
+
+@pytest.mark.parametrize("file_format", FORMATS)
+def test_every_format_reads_back_the_same_state(file_format):
+    assert loads(dumps(STATE, file_format)) == STATE
+
+
+def test_compact_json_has_no_whitespace_and_json_is_indented():
+    assert b"\n" not in dumps(STATE, "compact") and b": " not in dumps(STATE, "compact")
+    assert b"\n  " in dumps(STATE, "json")
+
+
+def test_corrupt_files_and_unknown_formats_raise_value_error():
+    for content in (dumps(STATE, "binary")[:-5], dumps(STATE, "compact")[:-5]):
+        with pytest.raises(ValueError):
+            loads(content)
+    with pytest.raises(ValueError):
+        dumps(STATE, "yaml")
+    with pytest.raises(ValueError):
+        path_for("saved_state", "yaml")
+
+
+def test_save_as_keeps_one_copy_under_the_format_extension(tmp_path):
+    stem = str(tmp_path / "saved_state")
+    assert find(stem) is None
+    assert save_as(stem, STATE, "compact") == stem + ".json"
+    assert save_as(stem, STATE, "binary") == stem + ".bin"
+    assert os.listdir(tmp_path) == ["saved_state.bin"]
+    assert find(stem) == stem + ".bin" and load(find(stem)) == STATE
+
+
+def test_find_prefers_the_newest_file(tmp_path):
+    stem = str(tmp_path / "saved_state")
+    (tmp_path / "saved_state.json").write_bytes(dumps({"saved": "json"}, "compact"))
+    (tmp_path / "saved_state.bin").write_bytes(dumps({"saved": "binary"}, "binary"))
+    os.utime(stem + ".bin", (1000, 1000))  # e.g. left by an older run that used the binary format
+    assert load(find(stem)) == {"saved": "json"}
+
+
+def test_binary_format_is_saved_under_its_own_extension(tmp_path, monkeypatch):
+    calendar, _store = open_calendar(tmp_path)
+    calendar["03-2025"] = {"05": [task("json")]}
+    calendar.compact()
+
+    monkeypatch.setattr(serialisation, "DEFAULT_FORMAT", "binary")
+    calendar, _store = open_calendar(tmp_path)
+    calendar["03-2025"]["05"].append(task("binary"))
+    calendar.mark_dirty(date(2025, 3, 5))
+    calendar.compact()
+    assert sorted(os.listdir(tmp_path / "calendar")) == ["03-2025.bin", JOURNAL_FILE, "manifest.json"]
+
+    monkeypatch.setattr(serialisation, "DEFAULT_FORMAT", "compact")
+    calendar, _store = open_calendar(tmp_path)
+    assert texts(calendar, "03-2025", "05") == ["json", "binary"]
@@ -0,0 +1,148 @@
+import random
+from datetime import timedelta
+
+import pytest
+from openpyxl import load_workbook
+from openpyxl.worksheet.cell_range import CellRange
+
+from helpers import timed, week_store
+from text_metrics import count_lines, line_height
+from timetable_export import (DAY_COLUMN_WIDTH, DEFAULT_ROW_HEIGHT, SlotTable, StyleRegistry, build_workbook,
+                              event_runs, export_week, export_weeks, plan_week, week_dates_for)
+
+LONG_NAME = "Introduction to Engineering Design and Innovation Workshop with an unusually long title"
+
+
+def export_store():  # The clash week with random tasks and a long name, so rows are merged and resized
+    store, week_dates = week_store(random.Random(1))
+    store.add_task(week_dates[1], timed(LONG_NAME, 600, 660))
+    return store, week_dates
+
+
+def merged(ws):
+    return sorted(str(cell_range) for cell_range in ws.merged_cells.ranges)
+
+
+def planned_merges(plan):
+    return sorted(str(CellRange(min_row=min_row, min_col=min_col, max_row=max_row, max_col=max_col))
+                  for min_row, min_col, max_row, max_col in plan["merges"])
+
+
+def values(ws):
+    return [[None if cell.value is None else str(cell.value) for cell in row] for row in ws.iter_rows()]
+
+
+def test_streamed_sheets_match_their_plans(tmp_path):
+    store, week_dates = export_store()
+    next_week = week_dates_for(week_dates[0] + timedelta(days=7))  # Empty, still gets its grid
+    path = tmp_path / "Timetable.xlsx"
+    export_weeks(store, [week_dates, next_week], str(path))
+
+    wb = load_workbook(path, rich_text=True)
+    assert wb.sheetnames == ["Week of 03 Mar 2025", "Week of 10 Mar 2025"]
+    for ws, dates in zip(wb.worksheets, [week_dates, next_week]):
+        plan = plan_week(store, dates)
+        assert merged(ws) == planned_merges(plan)
+        assert {row: ws.row_dimensions[row].height for row in plan["row_heights"]} == plan["row_heights"]
+        for event in plan["cells"].values():
+            cell = ws.cell(row=event["start_row"], column=event["column"])
+            assert str(cell.value) == f"{event['task']['text']}\nRoom"
+
+    assert plan_week(store, week_dates)["row_heights"]  # The long name needs a taller row
+
+
+def test_streamed_sheet_matches_the_single_week_export(tmp_path):
+    store, week_dates = export_store()
+    export_week(store, week_dates, str(tmp_path / "single.xlsx"))
+    export_weeks(store, [week_dates], str(tmp_path / "streamed.xlsx"))
+
+    single = load_workbook(tmp_path / "single.xlsx", rich_text=True).active
+    streamed = load_workbook(tmp_path / "streamed.xlsx", rich_text=True).active
+    assert values(streamed) == values(single)
+    assert merged(streamed) == merged(single)
+
+
+def test_every_streamed_sheet_uses_the_registry_settings(tmp_path):
+    store, week_dates = week_store()
+    next_monday = week_dates[0] + timedelta(days=7)
+    store.add_task(next_monday, timed("Weekly Lecture", 540, 600))
+    path = tmp_path / "Timetable.xlsx"
+    export_weeks(store, [week_dates, week_dates_for(next_monday)], str(path),
+                 StyleRegistry(font_size=14, lecture_colour="112233"))
+
+    for ws in load_workbook(path, rich_text=True).worksheets:
+        assert ws["A2"].font.sz == 14
+        assert ws["B3"].fill.start_color.rgb == "00112233"  # The 9am lecture on Monday
+
+
+def test_fills_follow_the_task_type_and_custom_colours():
+    store, week_dates = week_store()
+    ws = build_workbook(store, week_dates, StyleRegistry(lecture_colour="112233", tutorial_colour="445566")).active
+    plan = plan_week(store, week_dates)
+    fills = {event["task"]["text"]: ws.cell(row=event["start_row"], column=event["column"]).fill.start_color.rgb
+             for event in plan["cells"].values()}
+    assert fills == {"Lecture": "00112233", "Tutorial": "00445566", "Lab": "00445566", "Half Tutorial": "00445566"}
+
+
+def test_autofit_fits_long_words_and_wrapped_names():
+    store, week_dates = week_store()
+    store.add_task(week_dates[1], timed("Pneumonoultramicroscopicsilicovolcanoconiosis", 540, 600))
+    store.add_task(week_dates[3], timed(LONG_NAME, 600, 720))  # Two rows share the height it needs
+    plan = plan_week(store, week_dates)
+    widths, heights = plan["column_widths"], plan["row_heights"]
+
+    tuesday, thursday = plan["days"][1]["first_column"], plan["days"][3]["first_column"]
+    assert all(widths[column] >= DAY_COLUMN_WIDTH for column in range(2, plan["last_column"] + 1))
+    (long_word,) = plan["days"][1]["events"]
+    assert widths[tuesday] > DAY_COLUMN_WIDTH
+    assert count_lines(event_runs(long_word["task"], 12), widths[tuesday]) == 2  # The word and the location
+
+    (long_name,) = plan["days"][3]["events"]
+    lines = count_lines(event_runs(long_name["task"], 12), widths[thursday])
+    assert lines > 2
+    rows = range(long_name["start_row"], long_name["end_row"] + 1)
+    assert len(rows) == 2
+    assert sum(heights.get(row, DEFAULT_ROW_HEIGHT) for row in rows) >= lines * line_height(12) - 0.01
+    assert heights[long_word["start_row"]] == 2 * line_height(12)
+    assert set(heights) == {long_word["start_row"], *rows}  # Rows of short tasks keep the default height
+
+
+def test_plan_with_half_hour_slots():
+    store, week_dates = week_store()
+    plan = plan_week(store, week_dates, slot_minutes=30)
+    (half_tutorial,) = plan["days"][2]["events"]
+    slots = SlotTable(slot_minutes=30)
+    assert (half_tutorial["start_row"], half_tutorial["end_row"]) == slots.event_rows(630, 690)
+    assert half_tutorial["end_row"] - half_tutorial["start_row"] == 1  # 10:30 to 11:30 is two half hour rows
+
+
+@pytest.mark.parametrize("slot_minutes", [60, 30, 15])
+def test_slot_rows_match_the_time_of_each_row(slot_minutes):
+    slots = SlotTable(slot_minutes=slot_minutes)
+    for start in range(8 * 60, 21 * 60):
+        for length in (0, 1, slot_minutes, 90):
+            first_row, last_row = slots.event_rows(start, start + length)
+            end = min(start + max(length, 1), 21 * 60)  # The 8pm row covers until 9pm
+            assert first_row == (start - 8 * 60) // slot_minutes + 2
+            assert last_row == (end - 1 - 8 * 60) // slot_minutes + 2
+    assert slots.event_rows(7 * 60, 8 * 60) is None and slots.event_rows(21 * 60, 22 * 60) is None
+    assert slots.event_rows(7 * 60, 9 * 60)[0] == 2  # Clipped to the grid
+    assert slots.last_row == (21 - 8) * 60 // slot_minutes + 1
+
+
+def test_half_hour_events_are_written_on_their_rows(tmp_path):
+    store, week_dates = week_store()
+    path = tmp_path / "Timetable.xlsx"
+    export_weeks(store, [week_dates], str(path), slot_minutes=30)
+
+    ws = load_workbook(path, rich_text=True).active
+    labels = {ws.cell(row=row, column=1).value: row for row in range(2, ws.max_row + 1)}
+    assert str(ws.cell(row=labels["10:00 AM"] + 1, column=6).value) == "Half Tutorial\nRoom"  # Wednesday at 10:30
+    assert "D7:D9" in merged(ws)  # Monday's lab, 10:30 to 12:00
+    assert labels.get(None) and "10:30 AM" not in labels  # Half hours aren't labelled, like the week view
+
+
+def test_slot_length_must_divide_an_hour():
+    with pytest.raises(ValueError):
+        SlotTable(slot_minutes=25)
+
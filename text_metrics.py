@@ -0,0 +1,89 @@
+from functools import lru_cache
+import re
+
+# Advance widths of Calibri (Excel's default font) in font units, 2048 units per em
+UNITS_PER_EM = 2048
+CALIBRI_WIDTHS = {
+    " ": 463, "!": 548, '"': 821, "#": 1038, "$": 1038, "%": 1472, "&": 1397, "'": 452, "(": 621, ")": 621,
+    "*": 1038, "+": 1038, ",": 511, "-": 627, ".": 517, "/": 791, ":": 548, ";": 548, "<": 1038, "=": 1038,
+    ">": 1038, "?": 949, "@": 1837, "[": 627, "\\": 791, "]": 627, "_": 1038, "|": 943,
+    "0": 1038, "1": 1038, "2": 1038, "3": 1038, "4": 1038, "5": 1038, "6": 1038, "7": 1038, "8": 1038, "9": 1038,
+    "A": 1185, "B": 1114, "C": 1092, "D": 1260, "E": 1000, "F": 941, "G": 1292, "H": 1276, "I": 516, "J": 653,
+    "K": 1064, "L": 861, "M": 1751, "N": 1322, "O": 1356, "P": 1058, "Q": 1378, "R": 1112, "S": 941, "T": 998,
+    "U": 1314, "V": 1162, "W": 1822, "X": 1063, "Y": 998, "Z": 959,
+    "a": 981, "b": 1076, "c": 866, "d": 1076, "e": 1019, "f": 625, "g": 964, "h": 1076, "i": 470, "j": 490,
+    "k": 931, "l": 470, "m": 1636, "n": 1076, "o": 1080, "p": 1076, "q": 1076, "r": 714, "s": 801, "t": 686,
+    "u": 1076, "v": 925, "w": 1464, "x": 887, "y": 927, "z": 809
+}
+BOLD_FACTOR = 1.05  # Calibri Bold is about 5% wider
+MAX_DIGIT_PIXELS = 7  # Width of "0" in Calibri 11 at 96 dpi, the unit Excel column widths are measured in
+CELL_PADDING_PIXELS = 5
+LINE_SPACING = 1.25  # Excel row height per line of text as a multiple of the font size in points
+
+WORD_SPLIT = re.compile(r"(\s+)")
+
+
+@lru_cache(maxsize=None)
+def char_width(char, bold=False):  # Width in font units, characters outside the table count as wide as "0"
+    width = CALIBRI_WIDTHS.get(char, UNITS_PER_EM if ord(char) > 0x2E80 else 1038)  # CJK characters are a full em
+    return width * BOLD_FACTOR if bold else width
+
+
+@lru_cache(maxsize=4096)
+def text_width(text, size, bold=False):  # Width in pixels of a string without line breaks, words repeat so it is cached
+    return sum(char_width(char, bold) for char in text) / UNITS_PER_EM * size * 96 / 72
+
+
+def column_width_to_pixels(width):
+    return width * MAX_DIGIT_PIXELS + CELL_PADDING_PIXELS
+
+
+def pixels_to_column_width(pixels):
+    return max(0.0, (pixels - CELL_PADDING_PIXELS) / MAX_DIGIT_PIXELS)
+
+
+def line_height(size):  # Points
+    return size * LINE_SPACING
+
+
+def count_lines(runs, width):
+    # Lines needed to show rich text in a column width, runs are (text, size, bold). Excel wraps at spaces, breaks
+    # words longer than the cell and starts a new line at every explicit newline
+    available = max(column_width_to_pixels(width) - CELL_PADDING_PIXELS, 1)
+    lines = 1
+    line_width = 0.0
+
+    for text, size, bold in runs:
+        for paragraph_number, paragraph in enumerate(text.split("\n")):
+            if paragraph_number:
+                lines += 1
+                line_width = 0.0
+            for token in WORD_SPLIT.split(paragraph):
+                if not token:
+                    continue
+                token_width = text_width(token, size, bold)
+                if token.isspace():
+                    line_width += token_width
+                elif line_width + token_width <= available:
+                    line_width += token_width
+                elif token_width <= available:
+                    lines += 1
+                    line_width = token_width
+                else:  # Word longer than the cell is broken over as many lines as it needs
+                    extra_lines, remainder = divmod(token_width, available)
+                    lines += int(extra_lines) + (1 if line_width else 0)
+                    line_width = remainder
+    return lines
+
+
+def longest_word_width(runs):  # Column width needed so no word of the text has to be broken
+    widest = 0.0
+    for text, size, bold in runs:
+        for word in text.split():
+            widest = max(widest, text_width(word, size, bold))
+    return pixels_to_column_width(widest + CELL_PADDING_PIXELS)
+
+
+def text_height(runs, width):  # Points needed to show the wrapped text, based on the largest font used
+    size = max((run[1] for run in runs), default=11)
+    return count_lines(runs, width) * line_height(size)
@@ -0,0 +1,345 @@
+from bisect import bisect_right, insort
+from datetime import datetime, timedelta
+import argparse
+import hashlib
+import json
+import sys
+
+from openpyxl import Workbook
+from openpyxl.styles import Border, Side, Alignment
+from openpyxl.utils import get_column_letter
+from openpyxl.styles import Font
+from openpyxl.styles import PatternFill
+from openpyxl.cell.rich_text import CellRichText, TextBlock
+from openpyxl.cell.text import InlineFont
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.worksheet.cell_range import CellRange
+import requests
+
+from calendar_store import CalendarStore
+from ics_import import iter_vevents, merge_events
+from interval_layout import column_spans, partition_intervals
+from text_metrics import CELL_PADDING_PIXELS, longest_word_width, pixels_to_column_width, text_height, text_width
+
+LAYOUT_VERSION = 2  # Bump whenever a change to the layout or styling code changes the workbook, it invalidates cached exports
+WEEKDAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday"]  # Days shown on the exported timetable
+TIME_COLUMN_WIDTH = 10  # Minimum widths in Excel character units
+DAY_COLUMN_WIDTH = 20
+DEFAULT_ROW_HEIGHT = 15  # Points, rows that need less keep Excel's default height
+
+
+def format_time(minutes):  # 810 -> "1:30 PM", same as strftime("%#I:%M %p") but works on every platform
+    hour = minutes // 60
+    return f"{hour % 12 or 12}:{minutes % 60:02d} {'AM' if hour < 12 else 'PM'}"
+
+
+class SlotTable:  # Maps minutes since midnight to sheet rows in constant time, for slots of 60, 30, 15... minutes
+    def __init__(self, start_hour=8, end_hour=20, slot_minutes=60):
+        if slot_minutes <= 0 or 60 % slot_minutes:
+            raise ValueError(f"slot length must divide an hour, got {slot_minutes} minutes")
+        self.slot_minutes = slot_minutes
+        self.first_minute = start_hour * 60
+        self.end_minute = (end_hour + 1) * 60  # The end_hour row covers the hour that follows it
+        self.slot_starts = list(range(self.first_minute, self.end_minute, slot_minutes))
+        self.last_row = len(self.slot_starts) + 1  # Row 1 is the header
+
+        self.rows = [None] * (24 * 60)  # Row of every minute of the day, None outside the grid
+        for minute in range(self.first_minute, min(self.end_minute, 24 * 60)):
+            self.rows[minute] = (minute - self.first_minute) // slot_minutes + 2
+
+    def event_rows(self, start_minute, end_minute):  # First and last row an event covers, or None if it is off the grid
+        start = max(start_minute, self.first_minute)
+        end = min(max(end_minute, start_minute + 1), self.end_minute)  # Zero length events still get their row
+        if start >= end:
+            return None
+        return self.rows[start], self.rows[end - 1]
+
+    def labels(self):  # (row, label) for each slot, shorter slots are only labelled on the hour like the week view
+        for row, minute in enumerate(self.slot_starts, start=2):
+            show_label = self.slot_minutes == 60 or minute % 60 == 0
+            yield row, format_time(minute) if show_label else None
+
+
+class MergedRangeIndex:  # Per-column interval index of the ranges merged on a sheet, used to check cells in O(log n)
+    def __init__(self):
+        self.columns = {}  # column -> (min_row, max_row, min_col, max_col) of each range covering it, sorted by min_row
+        self.ranges = []  # In the order they were added, to be merged on the sheet by the writers
+
+    def add(self, min_row, min_col, max_row, max_col):
+        merged_range = (min_row, min_col, max_row, max_col)
+        if (min_row, min_col) != (max_row, max_col):  # Single cells are indexed but there's nothing to merge
+            self.ranges.append(merged_range)
+        for col in range(min_col, max_col + 1):
+            insort(self.columns.setdefault(col, []), (min_row, max_row, min_col, max_col))
+
+    def find(self, row, col):  # Range containing the cell or None, merged ranges never overlap so one bisect is enough
+        ranges = self.columns.get(col, [])
+        position = bisect_right(ranges, (row, float("inf"))) - 1
+        if position >= 0 and ranges[position][1] >= row:
+            return ranges[position]
+        return None
+
+
+def week_dates_for(day):  # Monday to Sunday of the week containing day
+    monday = day - timedelta(days=day.weekday())
+    return [monday + timedelta(days=i) for i in range(7)]
+
+
+def load_feed(source):  # Reads an ICS file path or http(s) URL into a new calendar store
+    store = CalendarStore()
+    if source.startswith(("http://", "https://")):
+        with requests.get(source, stream=True, timeout=30) as response:
+            response.raise_for_status()
+            merge_events(store.data, iter_vevents(response.iter_lines()))
+    else:
+        with open(source, "rb") as feed:
+            merge_events(store.data, iter_vevents(feed))
+    return store
+
+
+def plan_week(store, week_dates, start_hour=8, end_hour=20, font_size=12, slot_minutes=60):
+    # Decides every event's rows, column and width before anything is written, so the sheet is emitted in one pass.
+    # Clashing events get sub-columns within their day, as many as the most events running at the same time
+    days = []
+    next_column = 2  # Column A holds the times
+    slots = SlotTable(start_hour, end_hour, slot_minutes)
+    last_row = slots.last_row
+    merged_index = MergedRangeIndex()
+    cells = {}  # (row, column) of each event's top left cell -> event
+
+    for d in week_dates:
+        weekday = d.strftime("%A")
+        if weekday not in WEEKDAYS:
+            continue  # Skip weekends or unexpected dates
+
+        events = []
+        for task in store.timed_tasks(d):  # Untimed tasks are not exported
+            event_rows = slots.event_rows(task["start_minutes"], task["end_minutes"])
+            if event_rows is None:
+                continue  # Skip tasks outside the grid's hours
+            events.append({"task": task, "start_row": event_rows[0], "end_row": event_rows[1]})  # Partly used slots count
+
+        rows = [(event["start_row"], event["end_row"] + 1) for event in events]
+        columns, width = partition_intervals(rows)
+        spans = column_spans(rows, columns, width)  # Events widen over sub-columns that stay free for all their rows
+        for event, column, span in zip(events, columns, spans):
+            event["column"] = next_column + column
+            event["span"] = span
+            cells[(event["start_row"], event["column"])] = event
+            merged_index.add(event["start_row"], event["column"], event["end_row"], event["column"] + span - 1)
+
+        width = max(width, 1)
+        first_col, last_col = next_column, next_column + width - 1
+        if width > 1:  # Where a day has clash columns, free cells of each row are merged so it still reads as one column
+            for row in range(1, last_row + 1):
+                run_start = None
+                for col in range(first_col, last_col + 2):
+                    if col <= last_col and not merged_index.find(row, col):
+                        run_start = col if run_start is None else run_start
+                        continue
+                    if run_start is not None and col - 1 > run_start:
+                        merged_index.add(row, run_start, row, col - 1)
+                    run_start = None
+
+        days.append({"name": weekday, "first_column": first_col, "width": width, "events": events})
+        next_column += width
+
+    plan = {"slots": slots, "last_row": last_row, "last_column": next_column - 1,
+            "days": days, "cells": cells, "merges": merged_index.ranges}
+    plan["column_widths"], plan["row_heights"] = autofit(plan, font_size)
+    return plan
+
+
+def event_runs(task, font_size):  # The text StyleRegistry.event_value writes, as (text, size, bold) runs for measuring
+    return [(task.get("text", "Untitled"), font_size, True), (f"\n{task.get('location')}", font_size, False)]
+
+
+def autofit(plan, font_size):
+    # Column widths and row heights from measured text, in one pass over the planned events instead of sheet cells
+    time_width = max(text_width(label or "", font_size) for _row, label in plan["slots"].labels())
+    column_widths = {1: max(TIME_COLUMN_WIDTH, pixels_to_column_width(time_width + CELL_PADDING_PIXELS))}
+    for col in range(2, plan["last_column"] + 1):  # Every day column, including clash columns
+        column_widths[col] = DAY_COLUMN_WIDTH
+
+    for event in plan["cells"].values():  # Widen columns so no word of a single column event has to be broken
+        if event["span"] == 1:
+            column_widths[event["column"]] = max(column_widths[event["column"]],
+                                                 longest_word_width(event_runs(event["task"], font_size)))
+
+    row_heights = {}
+    for event in plan["cells"].values():
+        width = sum(column_widths[col] for col in range(event["column"], event["column"] + event["span"]))
+        rows = range(event["start_row"], event["end_row"] + 1)
+        height = text_height(event_runs(event["task"], font_size), width) / len(rows)  # Shared by the rows it covers
+        for row in rows:
+            if height > row_heights.get(row, DEFAULT_ROW_HEIGHT):
+                row_heights[row] = round(height, 2)
+
+    return column_widths, row_heights
+
+
+def plan_rows(plan):  # Yields each sheet row as (value, event) per column, event is None for cells without a task
+    header = {day["first_column"]: day["name"] for day in plan["days"]}
+    yield [("   ", None)] + [(header.get(col), None) for col in range(2, plan["last_column"] + 1)]
+
+    for row, label in plan["slots"].labels():
+        yield [(label, None)] + [  # 12-hour format 11:00 AM
+            (None, plan["cells"].get((row, col))) for col in range(2, plan["last_column"] + 1)
+        ]
+
+
+class StyleRegistry:  # Builds each named style once per workbook, every cell then shares these objects
+    def __init__(self, font_size=12, lecture_colour="D8E4BC", tutorial_colour="E6B8B7"):
+        self.settings = {"font_size": font_size, "lecture_colour": lecture_colour, "tutorial_colour": tutorial_colour}
+
+        self.font = Font(size=font_size)
+        thin = Side(style='thin', color='000000')
+        self.border = Border(left=thin, right=thin, top=thin, bottom=thin)
+        self.time_alignment = Alignment(vertical="top")
+        self.wrap_alignment = Alignment(vertical='top', wrap_text=True)
+
+        # styles used for rich text
+        self.normal_font = InlineFont(sz=font_size)
+        self.bold_font = InlineFont(b=True, sz=font_size)
+
+        self.lecture_fill = PatternFill(start_color=lecture_colour, end_color=lecture_colour, fill_type="solid")  # light green
+        self.tutorial_fill = PatternFill(start_color=tutorial_colour, end_color=tutorial_colour, fill_type="solid")  # light red
+
+    def event_value(self, event):  # Task name in bold with its location underneath
+        return CellRichText(
+            TextBlock(self.bold_font, event["task"].get("text", "Untitled")),
+            TextBlock(self.normal_font, f"\n{event['task'].get('location')}")
+        )
+
+    def event_fill(self, event):
+        task_type = event["task"].get("text", "Untitled").split()[-1].lower()
+        if task_type in ["lecture", "seminar"]:
+            return self.lecture_fill
+        return self.tutorial_fill
+
+
+def setup_sheet(ws, plan):  # Page setup and sizes, write-only sheets need these before the first row is written
+    ws.page_setup.orientation = "landscape"
+    ws.page_setup.fitToWidth = 1
+
+    for col, width in plan["column_widths"].items():
+        ws.column_dimensions[get_column_letter(col)].width = round(width, 2)
+
+    for row, height in plan["row_heights"].items():
+        ws.row_dimensions[row].height = height
+
+
+def build_workbook(store, week_dates, styles=None, slot_minutes=60):  # Lays out one week of timed tasks on a workbook, needs no UI
+    styles = styles or StyleRegistry()
+    wb = Workbook()
+    ws = wb.active
+    ws.title = "Week Schedule"
+
+    plan = plan_week(store, week_dates, font_size=styles.settings["font_size"], slot_minutes=slot_minutes)
+    setup_sheet(ws, plan)
+
+    for row, row_cells in enumerate(plan_rows(plan), start=1):
+        for col, (value, event) in enumerate(row_cells, start=1):
+            cell = ws.cell(row=row, column=col)
+            cell.border = styles.border
+            if event:
+                cell.value = styles.event_value(event)
+                cell.fill = styles.event_fill(event)
+                cell.alignment = styles.wrap_alignment
+                continue
+
+            cell.value = value
+            cell.font = styles.font
+            if col == 1 and row > 1:
+                cell.alignment = styles.time_alignment
+
+    for min_row, min_col, max_row, max_col in plan["merges"]:
+        ws.merge_cells(start_row=min_row, start_column=min_col, end_row=max_row, end_column=max_col)
+
+    return wb
+
+
+def week_fingerprint(store, week_dates, styles=None, slot_minutes=60):  # Hash of everything that decides the workbook
+    styles = styles or StyleRegistry()
+    days = [
+        [d.strftime("%Y-%m-%d"), [[task["start_minutes"], task["end_minutes"], task.get("text"), task.get("location")]
+                                  for task in store.timed_tasks(d)]]
+        for d in week_dates if d.strftime("%A") in WEEKDAYS
+    ]
+    content = json.dumps([LAYOUT_VERSION, styles.settings, slot_minutes, days], sort_keys=True)
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+
+def export_week(store, week_dates, output_path="Timetable.xlsx", styles=None, slot_minutes=60):
+    wb = build_workbook(store, week_dates, styles, slot_minutes)
+    wb.save(output_path)
+    return output_path
+
+
+def export_weeks(store, weeks, output_path="Timetable.xlsx", styles=None, slot_minutes=60):
+    # Streams one sheet per week through openpyxl's write-only mode. Rows are written out as they are produced
+    # and each week is planned only when its sheet is reached, so memory stays flat however many weeks are exported
+    styles = styles or StyleRegistry()  # Shared by every sheet
+    wb = Workbook(write_only=True)
+
+    for week_dates in weeks:
+        plan = plan_week(store, week_dates, font_size=styles.settings["font_size"], slot_minutes=slot_minutes)
+        ws = wb.create_sheet(title=f"Week of {week_dates[0].strftime('%d %b %Y')}")
+        setup_sheet(ws, plan)
+
+        for row, row_cells in enumerate(plan_rows(plan), start=1):
+            sheet_row = []
+            for col, (value, event) in enumerate(row_cells, start=1):
+                cell = WriteOnlyCell(ws, value=styles.event_value(event) if event else value)
+                cell.border = styles.border  # Covered cells of merged ranges need their borders written too
+                if event:
+                    cell.fill = styles.event_fill(event)
+                    cell.alignment = styles.wrap_alignment
+                else:
+                    cell.font = styles.font
+                    if col == 1 and row > 1:
+                        cell.alignment = styles.time_alignment
+                sheet_row.append(cell)
+            ws.append(sheet_row)
+
+        for min_row, min_col, max_row, max_col in plan["merges"]:
+            ws.merged_cells.add(CellRange(min_row=min_row, min_col=min_col, max_row=max_row, max_col=max_col))
+
+    wb.save(output_path)
+    return output_path
+
+
+def main(argv=None):  # Command line entry point so timetables can be generated without starting the app
+    parser = argparse.ArgumentParser(description="Export one week of an .ics timetable to Excel.")
+    parser.add_argument("source", help="path or URL of the .ics timetable")
+    parser.add_argument("--week", help="any date in the week to export as YYYY-MM-DD (default: this week)")
+    parser.add_argument("-o", "--output", default="Timetable.xlsx", help="workbook to write (default: Timetable.xlsx)")
+    parser.add_argument("--weeks", type=int, default=1, help="number of consecutive weeks, one sheet each (default: 1)")
+    parser.add_argument("--slot-minutes", type=int, default=60, choices=[60, 30, 15],
+                        help="length of each row of the timetable (default: 60)")
+    parser.add_argument("--streaming", action="store_true",
+                        help="write rows as they are produced (always used when exporting more than one week)")
+    args = parser.parse_args(argv)
+
+    try:
+        day = datetime.strptime(args.week, "%Y-%m-%d") if args.week else datetime.now()
+    except ValueError:
+        parser.error(f"invalid week date: {args.week}")
+
+    try:
+        store = load_feed(args.source)
+        if args.weeks > 1 or args.streaming:
+            weeks = (week_dates_for(day + timedelta(weeks=week)) for week in range(args.weeks))
+            export_weeks(store, weeks, args.output, slot_minutes=args.slot_minutes)
+        else:
+            export_week(store, week_dates_for(day), args.output, slot_minutes=args.slot_minutes)
+    except Exception as e:
+        print(f"Failed to export timetable: {e}", file=sys.stderr)
+        return 1
+
+    print(f"Excel timetable generated: {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
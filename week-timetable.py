@@ -6,8 +6,6 @@ from kivymd.uix.screen import MDScreen
 from kivymd.uix.boxlayout import MDBoxLayout
 from kivymd.uix.button import MDRaisedButton, MDIconButton, MDFlatButton
 from kivymd.uix.label import MDLabel
-from kivy.uix.label import Label
-from kivy.uix.gridlayout import GridLayout
 from kivy.uix.scrollview import ScrollView
 from kivymd.uix.textfield import MDTextField
 from kivymd.uix.selectioncontrol import MDCheckbox
@@ -21,23 +19,26 @@ from datetime import timedelta, datetime
 import os
 import json
 
+# Background import
+import threading
+import time
+from kivy.clock import Clock
+
 # Managing ics link
-import requests
-from ics import Calendar
+from feed_cache import fetch_feed, clear_feed_cache, save_feed_validators
+from ics_import import apply_changes, diff_events, iter_vevents
+from calendar_store import CalendarStore, as_date, parse_minutes
+from calendar_journal import ShardedCalendar
+
+# Week view
+from week_grid import WeekGrid, WeekHeader
+from week_layout import WeekLayoutCache
+from term_view import TERM_WEEKS, TermView
 
 # Excel
-from openpyxl import Workbook
-from openpyxl.styles import Border, Side, Alignment
-from openpyxl.utils import get_column_letter
-from openpyxl.styles import Font
-from openpyxl.styles import PatternFill
-from openpyxl.cell.rich_text import CellRichText, TextBlock
-from openpyxl.cell.text import InlineFont
-from copy import copy
-
-import re
-
-calendar_data = {}
+from export_cache import cached_export_week
+
+calendar_store = CalendarStore()  # Holds calendar_data and indexes each day's timed tasks by start time
 settings_dict = {}
 
 
@@ -141,12 +142,19 @@ class WeekViewScreen(MDScreen):  # Week calendar view class
         self.uni_checkbox = MDCheckbox(active=True)
         self.other_checkbox = MDCheckbox(active=True)
         self.link_input = None
+        self.sync_label = None
+        self.week_header = None
+        self.week_grid = None
+        self.week_cache = WeekLayoutCache(calendar_store)  # Shown and neighbouring weeks, so navigating doesn't wait
+        self.prefetch_queue = []  # Mondays of weeks to lay out in the coming frames
+        self.prefetch_trigger = Clock.create_trigger(self.prefetch_next_week)
         self.task_content = TaskDialogContent()
         self.week_dates = self.get_current_week_dates()
         self.current_monday = self.get_current_week_dates()[0]
         self.static_layout = MDBoxLayout(orientation="vertical", spacing=10, padding=10)  # stores static content like buttons
         self.calendar_dynamic_container = MDBoxLayout(orientation="vertical")
         self.build_week_first_run()
+        calendar_store.subscribe(self.on_day_changed)  # Task changes redraw just their day
 
     def build_week_first_run(self):
         # builds header once avoid rerunning when rendering calendar
@@ -199,6 +207,14 @@ class WeekViewScreen(MDScreen):  # Week calendar view class
         )
         top_row.add_widget(add_btn)
 
+        overview_btn = MDIconButton(
+            icon="calendar-month",
+            on_release=lambda *args: MDApp.get_running_app().show_overview(self.current_monday),
+            theme_text_color="Custom",
+            text_color=MDApp.get_running_app().theme_cls.primary_color
+        )
+        top_row.add_widget(overview_btn)
+
         prev_btn = MDIconButton(
             icon="chevron-left",
             on_release=self.previous_week,
@@ -215,107 +231,64 @@ class WeekViewScreen(MDScreen):  # Week calendar view class
         )
         top_row.add_widget(next_btn)
 
+        self.sync_label = MDLabel(text="", halign="right", font_style="Caption", theme_text_color="Secondary")
+        top_row.add_widget(self.sync_label)  # Shows progress of the background timetable import
+
         static_layout.add_widget(top_row)
+
+        # Day headers and the time grid are drawn on canvases, week changes only swap what they draw
+        block_colour = MDApp.get_running_app().theme_cls.primary_light
+        self.week_header = WeekHeader(highlight_colour=block_colour)
+        self.week_grid = WeekGrid(block_colour=block_colour)
+        self.week_grid.bind(on_task_press=self.show_task_details)
+        self.calendar_dynamic_container.add_widget(self.week_header)
+        scroll = ScrollView()
+        scroll.add_widget(self.week_grid)
+        self.calendar_dynamic_container.add_widget(scroll)
+
         static_layout.add_widget(self.calendar_dynamic_container)  # add
         self.add_widget(static_layout)
 
         self.build_week()
 
-    def build_week(self):  # builds cells and tasks and takes care of collisions
-        self.calendar_dynamic_container.clear_widgets()
-        calendar_dynamic_container = self.calendar_dynamic_container
-
-        # Weekday header
-        header = GridLayout(cols=8, size_hint_y=None, height=36)
-        header.add_widget(MDLabel(text="Time", halign="center"))
-        for day in self.week_dates:
-            header.add_widget(MDLabel(text=day.strftime("%a\n%d %b"), markup=True, halign="center"))
-        calendar_dynamic_container.add_widget(header)
-
-        # Untimed task row
-        untimed_row = GridLayout(cols=8, size_hint_y=None, height=60, spacing=4)
-        untimed_row.add_widget(MDLabel(text="Untimed/All-Day", halign="center", theme_text_color="Secondary"))
-
-        for d in self.week_dates:
-            month_key, day = d.strftime("%m-%Y"), d.strftime("%d")
-            tasks = calendar_data.get(month_key, {}).get(day, [])
-
-            untimed_cell = MDBoxLayout(
-                orientation="vertical",
-                spacing=2,
-                padding=4,
-                md_bg_color=(0.92, 0.92, 0.92, 1)
-            )
+    def build_week(self):  # Hands the week's layout to the canvas widgets, no widgets are rebuilt
+        layout = self.week_cache.get(self.week_dates[0])
+        self.week_header.set_week(layout)
+        self.week_grid.set_week(layout)
 
-            for task in tasks:
-                if not ("start_time" in task and "end_time" in task):
-                    untimed_cell.add_widget(Label(text=f"• {task['text']}", font_size=10))
-                    untimed_cell.md_bg_color = MDApp.get_running_app().theme_cls.primary_light
-
-            untimed_row.add_widget(untimed_cell)
-
-        calendar_dynamic_container.add_widget(untimed_row)
-
-        # Time grid
-        grid = GridLayout(cols=8, spacing=4, size_hint_y=None)
-        grid.bind(minimum_height=grid.setter("height"))
-
-        # Build 30 min intervals
-        interval_times = []
-        time = datetime.strptime("08:00", "%H:%M")
-        while time <= datetime.strptime("19:30", "%H:%M"):
-            interval_times.append(time.strftime("%H:%M"))
-            time += timedelta(minutes=30)
-
-        # Render time slots
-        for interval in interval_times:
-            show_label = interval.endswith(":00")  # Show only on full hour
-            grid.add_widget(MDLabel(text=interval if show_label else "", halign="center", theme_text_color="Secondary"))
-
-            for d in self.week_dates:
-                month_key, day = d.strftime("%m-%Y"), d.strftime("%d")
-                tasks = calendar_data.get(month_key, {}).get(day, [])
-
-                # Filter tasks active at this interval
-                active_tasks = []
-                current_time = datetime.strptime(interval, "%H:%M")
-
-                for task in tasks:
-                    if "start_time" in task and "end_time" in task:
-                        start = datetime.strptime(task["start_time"], "%H:%M")
-                        end = datetime.strptime(task["end_time"], "%H:%M")
-                        if start <= current_time < end:
-                            active_tasks.append(task)
-
-                # Create cell and split vertically if needed
-                cell = MDBoxLayout(
-                    orientation="horizontal",
-                    spacing=1,
-                    padding=2,
-                    height=30,
-                    size_hint_y=None,
-                    md_bg_color=(0.95, 0.95, 0.95, 1)
-                )
+        # The weeks either side are laid out one per frame after this one is drawn, ready for the next click
+        self.prefetch_queue = [self.current_monday - timedelta(days=7), self.current_monday + timedelta(days=7)]
+        self.prefetch_trigger()
+
+    def on_day_changed(self, day):  # Called by calendar_store after a task is added, edited or removed
+        if day is None:  # Bulk change, start over
+            self.week_cache.invalidate()
+            self.build_week()
+            return
 
-                if active_tasks:
-                    for task in active_tasks:
-                        task_box = MDBoxLayout(
-                            orientation="vertical",
-                            size_hint_x=(1 / len(active_tasks)),
-                            md_bg_color=MDApp.get_running_app().theme_cls.primary_light,
-                            padding=2
-                        )
-                        task_box.add_widget(Label(
-                            text=f"{task['text']}\n{task['start_time']}-{task['end_time']}",
-                            font_size=9
-                        ))
-                        cell.add_widget(task_box)
-
-                grid.add_widget(cell)
+        index = (day - as_date(self.week_dates[0])).days
+        if not 0 <= index < 7:
+            self.week_cache.update_day(day)  # Not visible, only the cached layout of its week needs to change
+            return
 
-        scroll = ScrollView()
-        scroll.add_widget(grid)
-        calendar_dynamic_container.add_widget(scroll)
+        layout = self.week_cache.update_day(day)
+        if layout is None or layout is not self.week_grid.layout:
+            self.build_week()  # The shown week had been dropped from the cache
+        else:
+            self.week_grid.redraw_day(index)
+            self.week_header.redraw()
+
+    def prefetch_next_week(self, _dt):
+        if self.prefetch_queue:
+            self.week_cache.prefetch(self.prefetch_queue.pop(0))
+        if self.prefetch_queue:
+            self.prefetch_trigger()
+
+    def show_task_details(self, _grid, task):  # Tapping a task on the grid
+        details = f"{task['text']}  {task.get('start_time', '')}-{task.get('end_time', '')}"
+        if task.get("location"):
+            details += f"  {task['location']}"
+        MDApp.get_running_app().show_message(details)
 
     def previous_week(self, *_):
         self.current_monday -= timedelta(days=7)
@@ -332,241 +305,19 @@ class WeekViewScreen(MDScreen):  # Week calendar view class
         ]
         self.build_week()
 
-    def generate_excel(self, _):
-        wb = Workbook()
-        ws = wb.active
-        ws.title = "Week Schedule"
-        ws.page_setup.orientation = ws.ORIENTATION_LANDSCAPE
-        ws.page_setup.fitToWidth = 1
-
-        # styling
-        font_style = Font(size=12)
-        border_style = Border(
-            left=Side(style='thin', color='000000'),
-            right=Side(style='thin', color='000000'),
-            top=Side(style='thin', color='000000'),
-            bottom=Side(style='thin', color='000000')
-        )
-
-        start_hour = 8
-        end_hour = 20
-        time_slots = [
-            datetime.strptime(f"{hour}:00", "%H:%M").strftime("%#I:%M %p")  # 12-hour format 11:00 AM
-            for hour in range(start_hour, end_hour + 1)
-        ]
-
-        weekdays = ["   ", "Monday", "Tuesday", "Wednesday", "Thursday", "Friday"]
-        ws.append(weekdays)
-
-        for time in time_slots:
-            ws.append([time])
-            current_row = ws.max_row  # max_row gets the last row in sheet
-            ws.cell(row=current_row, column=1).alignment = Alignment(vertical="top")
-
-        merged_cells = {}
-        day_column_map = {  # used to handle collisions
-            "Monday": 1,
-            "Tuesday": 2,
-            "Wednesday": 3,
-            "Thursday": 4,
-            "Friday": 5
-        }
-        for d in self.week_dates:  # handle each day in the week
-            timetable_clash = False
-            weekday = d.strftime("%A")
-            if weekday not in weekdays:
-                continue  # Skip weekends or unexpected dates
-
-            day_column = day_column_map[weekday]
-            month_key, day = d.strftime("%m-%Y"), d.strftime("%d")
-            tasks = calendar_data.get(month_key, {}).get(day, [])
-
-            day_tasks_collision_handler = {}
-            clashed_tasks = set()  # using set to auto handle duplicate entries
-
-            for task in tasks:  # handle tasks for each day
-                exit_var = False
-                if "start_time" not in task or "end_time" not in task:
-                    continue
-
-                start_time = datetime.strptime(task["start_time"], "%H:%M")
-                end_time = datetime.strptime(task["end_time"], "%H:%M")
-                task_name = task.get("text", "Untitled")
-                task_location = task.get("location")
-
-                current_time = start_time
-                while current_time < end_time:
-                    task_hour = current_time.hour
-                    if task_hour not in day_tasks_collision_handler:
-                        day_tasks_collision_handler[task_hour] = [task_name]
-                        current_time += timedelta(hours=1)
-                    else:
-                        day_tasks_collision_handler[task_hour].append(task_name)
-                        current_time += timedelta(hours=1)
-                        for clashing_task in day_tasks_collision_handler[task_hour]:
-                            clashed_tasks.add(clashing_task)
-
-                        if timetable_clash:  # collision already handled, just add times into dictionary
-                            continue
-
-                        # collision not handled yet
-                        ws.insert_cols(day_column + 2)  # index + 1, then add 1 more to insert column on right
-
-                        # update the day column map
-                        for day in day_column_map:
-                            if day_column_map[day] >= day_column + 1:
-                                day_column_map[day] += 1
-
-                        day_column = day_column_map[weekday] + 1
-                        timetable_clash = True
-
-                duration_minutes = (end_time - start_time).seconds // 60
-                row_span = duration_minutes // 60
-
-                start_slot_str = start_time.strftime("%#I:%M %p")
-                if start_slot_str not in time_slots:
-                    continue  # Skip if time doesn't match a slot
-
-                start_row = time_slots.index(start_slot_str) + 2  # +2 for header rows
-                end_row = start_row + row_span - 1
-                current_cells = [start_row, end_row]
-
-                col_letter = get_column_letter(day_column + 1)  # +1 as Excel col indexes start at 1, eg A = 1
-
-                if col_letter in merged_cells.keys():
-                    for cell in current_cells:
-                        if cell in merged_cells[col_letter]:
-                            exit_var = True
-                            break  # If cell has been merged, don't change cell value
-                    if exit_var:
-                        continue
-
-                # styles used for rich text
-                normal_font = InlineFont(sz=12)
-                bold_font = InlineFont(b=True, sz=12)
-
-                ws[f"{col_letter}{start_row}"].value = CellRichText(
-                                        TextBlock(bold_font, task_name),
-                                        TextBlock(normal_font, f"\n{task_location}")
-                                    )
-
-                task_type = task_name.split()[-1].lower()
-                if task_type in ["lecture", "seminar"]:
-                    fill = PatternFill(start_color="D8E4BC", end_color="D8E4BC", fill_type="solid")  # light green
-                else:
-                    fill = PatternFill(start_color="E6B8B7", end_color="E6B8B7", fill_type="solid")  # light red
-
-                ws[f"{col_letter}{start_row}"].fill = fill
-
-                ws.merge_cells(f"{col_letter}{start_row}:{col_letter}{end_row}")
-                if col_letter not in merged_cells:
-                    merged_cells[col_letter] = current_cells
-                else:
-                    for cell in current_cells:
-                        merged_cells[col_letter].append(cell)
-                ws[f'{col_letter}{start_row}'].alignment = Alignment(
-                    vertical='top',
-                    wrap_text=True
-                )
-
-            # to manage timetable clashes, create another column for clashing tasks and merge all other cells in columns
-            if timetable_clash:
-                no_merge_hours = set()  # used to store hours when clashes occur
-
-                for hour, tasks in day_tasks_collision_handler.items():
-                    for task_name in tasks:
-                        if task_name in clashed_tasks:
-                            no_merge_hours.add(hour)
-
-                for row in range(1, ws.max_row + 1):
-                    if row + 6 in no_merge_hours:
-                        continue  # clash so don't merge. row + 6 used to indicate time indices in Excel (starts at 8)
-
-                    start_col_num = day_column_map[weekday] + 1
-                    end_col_num = day_column + 1
-                    start_col = get_column_letter(start_col_num)
-                    end_col = get_column_letter(end_col_num)
-
-                    if self.is_cell_merged(ws, row, start_col_num) or self.is_cell_merged(ws, row, end_col_num):
-                        # handle cases where horizontal merge is needed but vertical merge exists
-                        for merged_range in list(ws.merged_cells.ranges):
-                            if (
-                                    merged_range.min_col == merged_range.max_col
-                                    and
-                                    merged_range.min_row == row
-                            ):
-                                if start_col_num <= merged_range.min_col <= end_col_num:
-                                    # found the entire vertical merge range affecting this row
-                                    min_row = merged_range.min_row
-                                    max_row = merged_range.max_row
-                                    # if top left cell in new range empty, first move data and styling there
-                                    if ws[f'{start_col}{min_row}'].value is None or ws[f'{start_col}{min_row}'].value == '':
-                                        target = ws[f'{start_col}{min_row}']
-                                        source = ws[f'{end_col}{min_row}']
-
-                                        target.value = source.value
-                                        target.alignment = copy(source.alignment)
-                                        target.fill = copy(source.fill)
-                                        target.font = copy(source.font)
-                                        target.border = copy(source.border)
-
-                                    # unmerge existing vertical merge first to avoid Excel file corruption
-                                    ws.unmerge_cells(str(merged_range))
-                                    ws.merge_cells(f"{start_col}{min_row}:{end_col}{max_row}")
-                                    break
-                        continue
-
-                    ws.merge_cells(f"{start_col}{row}:{end_col}{row}")
-
-        for row in ws.iter_rows(min_row=1, max_row=ws.max_row, min_col=1, max_col=ws.max_column):
-            for cell in row:
-                if not isinstance(cell.value, CellRichText):  # don't overwrite cells with bold text
-                    cell.font = font_style
-                cell.border = border_style
-
-        ws.column_dimensions['A'].width = 10
-
-        for i in range(66, 70 + 1):  # ASCII values
-            ws.column_dimensions[chr(i)].width = 20
-
-        for row in range(2, ws.max_row + 1):  # skips header column
-
-            max_height = 15  # default Excel height
-
-            for col in range(2, ws.max_column + 1):
-                cell = ws.cell(row=row, column=col)
-
-                if cell.value:
-                    text_length = len(str(cell.value))
-
-                    chars_per_line = 22  # rough guess
-                    lines = (text_length // chars_per_line) + 1
-
-                    estimated_height = lines * 18  # 18 = height per line
-
-                    if estimated_height > max_height:
-                        max_height = estimated_height
-
-            if max_height > 15:
-                ws.row_dimensions[row].height = max_height
+    def show_week_of(self, day):  # Jumps to the week containing day, used by the month and term views
+        day = datetime.combine(day, datetime.min.time())
+        self.current_monday = day - timedelta(days=day.weekday())
+        self.update_week()
 
-        # Save file
+    def generate_excel(self, _):
         try:
-            wb.save('Timetable.xlsx')
+            cache_dir = os.path.join(MDApp.get_running_app().user_data_dir, "export_cache")
+            cached_export_week(calendar_store, self.week_dates, 'Timetable.xlsx', cache_dir)  # Unchanged weeks are copied
             MDApp.get_running_app().show_message('Excel timetable generated')
         except Exception as e:
             MDApp.get_running_app().show_message(str(e))
 
-    def is_cell_merged(self, ws, row, col):
-        for merged_range in ws.merged_cells.ranges:
-            if (
-                    merged_range.min_row <= row <= merged_range.max_row
-                    and
-                    merged_range.min_col <= col <= merged_range.max_col
-            ):
-                return True
-        return False
-
     def get_current_week_dates(self):
         today = datetime.now()
         monday_current_week = today - timedelta(days=today.weekday())
@@ -606,23 +357,18 @@ class WeekViewScreen(MDScreen):  # Week calendar view class
         except Exception as e:
             print(f"Failed to save link: {e}")  # Used in event of any errors, then they will be printed
 
-    def save_task(self, *_args):
-        global calendar_data
+        MDApp.get_running_app().start_background_import()  # Import from the new link straight away
+
+    def set_sync_status(self, text):
+        if self.sync_label:
+            self.sync_label.text = text
 
+    def save_task(self, *_args):
         task_name = self.task_content.text_input.text.strip()
         if not task_name:
             print("Task name is required.")
             return
 
-        date_str_day = self.task_content.date.strftime("%d")  # e.g. "31"
-        date_str_month = self.task_content.date.strftime("%m-%Y")  # e.g. "07-2025"
-
-        # Initialise nested dicts if necessary
-        if date_str_month not in calendar_data:
-            calendar_data[date_str_month] = {}
-        if date_str_day not in calendar_data[date_str_month]:
-            calendar_data[date_str_month][date_str_day] = []
-
         # Build task dictionary
         task = {
             "text": task_name,
@@ -633,21 +379,87 @@ class WeekViewScreen(MDScreen):  # Week calendar view class
             try:
                 task["start_time"] = self.task_content.start_time_btn.text.split("Start: ")[1]
                 task["end_time"] = self.task_content.end_time_btn.text.split("End: ")[1]
+                task["start_minutes"] = parse_minutes(task["start_time"])  # Strings are kept for display only
+                task["end_minutes"] = parse_minutes(task["end_time"])
             except IndexError:
                 print("Missing time selection")
                 return
 
-        # Add task to calendar
-        calendar_data[date_str_month][date_str_day].append(task)
+        # Add task to calendar, stored under its "MM-YYYY" month and "DD" day keys
+        # Saved as one journal line, and redraws the task's day if it is in the shown week
+        calendar_store.add_task(self.task_content.date, task)
         self.dialog.dismiss()
-        MDApp.get_running_app().save_data()
+
+
+class OverviewScreen(MDScreen):  # Month and term views, only the weeks scrolled into view are built
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.mode = "month"
+        self.first_day = datetime.now().date()  # Any day of the month shown, or the first week of the term
+        self.title_label = MDLabel(text="", halign="center", font_style="H6")
+        self.term_view = TermView(calendar_store)
+        self.term_view.bind(on_day_press=self.open_day)
+        calendar_store.subscribe(self.term_view.on_day_changed)
+
+        top_row = MDBoxLayout(spacing=10, padding=5, size_hint_y=None, height=60)
+        primary_color = MDApp.get_running_app().theme_cls.primary_color
+        top_row.add_widget(MDIconButton(icon="arrow-left", on_release=self.back_to_week,
+                                        theme_text_color="Custom", text_color=primary_color))
+        top_row.add_widget(MDFlatButton(text="Month", on_release=lambda *args: self.set_mode("month")))
+        top_row.add_widget(MDFlatButton(text="Term", on_release=lambda *args: self.set_mode("term")))
+        top_row.add_widget(MDIconButton(icon="chevron-left", on_release=lambda *args: self.move(-1),
+                                        theme_text_color="Custom", text_color=primary_color))
+        top_row.add_widget(MDIconButton(icon="chevron-right", on_release=lambda *args: self.move(1),
+                                        theme_text_color="Custom", text_color=primary_color))
+        top_row.add_widget(self.title_label)
+
+        layout = MDBoxLayout(orientation="vertical", spacing=10, padding=10)
+        layout.add_widget(top_row)
+        layout.add_widget(self.term_view)
+        self.add_widget(layout)
+
+    def show_from(self, day):
+        self.first_day = day
+        self.refresh()
+
+    def set_mode(self, mode):
+        self.mode = mode
+        self.refresh()
+
+    def move(self, step):  # A month at a time, or a whole term
+        if self.mode == "month":
+            month_index = self.first_day.year * 12 + self.first_day.month - 1 + step
+            self.first_day = self.first_day.replace(year=month_index // 12, month=month_index % 12 + 1, day=1)
+        else:
+            self.first_day += timedelta(weeks=TERM_WEEKS * step)
+        self.refresh()
+
+    def refresh(self):
+        if self.mode == "month":
+            self.term_view.show_month(self.first_day.year, self.first_day.month)
+            self.title_label.text = self.first_day.strftime("%B %Y")
+        else:
+            self.term_view.show_term(self.first_day)
+            last_day = self.first_day + timedelta(weeks=TERM_WEEKS) - timedelta(days=1)
+            self.title_label.text = f"{self.first_day.strftime('%d %b %Y')} - {last_day.strftime('%d %b %Y')}"
+
+    def open_day(self, _view, day):
+        MDApp.get_running_app().week_screen.show_week_of(day)
+        self.back_to_week()
+
+    def back_to_week(self, *_args):
+        self.manager.current = "week"
 
 
 class WeekTimetableApp(MDApp):  # Class defines the main app
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
-        self.load_data()
+        self.import_thread = None  # Worker thread that fetches the timetable feed without blocking the UI
+        self.calendar = ShardedCalendar(self.user_data_dir)  # A file per month plus a journal of the latest changes
+        self.load_settings()
+        self.load_data()  # Only reads the saved json, so the window appears without waiting for the network
         self.week_screen = WeekViewScreen(name="week")
+        self.overview_screen = None
 
     def build(self):
         self.title = "Week Timetable"
@@ -657,93 +469,149 @@ class WeekTimetableApp(MDApp):  # Class defines the main app
 
         screen_manager = ScreenManager()
         screen_manager.add_widget(self.week_screen)
+        self.overview_screen = OverviewScreen(name="overview")
+        screen_manager.add_widget(self.overview_screen)
 
         return screen_manager
 
-    def save_data(self):  # Function saves the entered data to a json file in Users/AppData/Roaming/calendar
-        save_path = os.path.join(self.user_data_dir, "saved_state.json")  # Compatible file path for all platforms
+    def on_start(self):
+        self.start_background_import()  # Saved data is already on screen, fresh uni tasks are swapped in when ready
+
+    def save_data(self):  # Writes months changed in bulk to Users/AppData/Roaming/calendar, single tasks are journalled
         try:
-            os.makedirs(self.user_data_dir, exist_ok=True)
-            with open(save_path, "w") as file:
-                json.dump(calendar_data, file, indent=2)  # Indent used for readability of json
+            self.calendar.compact()
+            return True
         except Exception as e:
             print(f"Failed to save data: {e}")  # Used in event of any errors, then they will be printed
+            return False
 
-    def load_data(self):  # Function runs to load all data saved in json
-        global calendar_data  # Using global calendar data
+    def load_data(self):  # Only reads the journal and which months are saved, each month is read when first shown
         try:
-            save_path = os.path.join(self.user_data_dir, "saved_state.json")
-            if not os.path.exists(save_path):
-                return  # If first time launch, json does not exist, so end execution
-
-            with open(save_path, "r") as file:
-                calendar_data = json.load(file)  # Retrieve data from json
-
-            self.import_ics_to_calendar_data()  # Load in uni timetable data
-
+            if not self.calendar.exists():
+                clear_feed_cache(self.user_data_dir)  # A cached feed belongs to saved data that no longer exists
+            self.calendar.load()  # Also moves saved_state.json of older versions into month files
         except Exception as e:  # In case of an error
             print(f"Error loading saved data: {e}")
 
-    def import_ics_to_calendar_data(self):
+        self.calendar.on_evict = calendar_store.forget_month
+        calendar_store.replace(self.calendar)
+        calendar_store.journal = self.calendar
+
+    def load_settings(self):  # Loads the saved link before the screen is built so the text field can show it
         global settings_dict
-        global calendar_data
-        settings_path = os.path.join(self.user_data_dir, "settings.json")  # Load link
-        if not os.path.exists(settings_path):
+        settings_path = os.path.join(self.user_data_dir, "settings.json")
+        try:
+            if os.path.exists(settings_path):
+                with open(settings_path) as file:
+                    settings_dict = json.load(file)
+        except Exception as e:
+            print(f"Error loading settings: {e}")
+
+    def start_background_import(self):
+        if not settings_dict.get("ics_url"):
             print("No link saved.")
             return False
 
+        if self.import_thread is not None:
+            return False  # An import is already running, finish_import starts another if the link changed meanwhile
+
+        index = self.calendar.uid_index  # Read from disk by the worker the first time
+        if index is not None:
+            index = dict(index)  # The worker's copy, imports replace entries rather than edit them
+
+        self.week_screen.set_sync_status("Syncing timetable...")
+        self.import_thread = threading.Thread(
+            target=self.import_ics_to_calendar_data,
+            args=(settings_dict["ics_url"], index),
+            daemon=True  # Don't keep the app alive on exit because of a slow network
+        )
+        self.import_thread.start()
+        return True
+
+    def import_ics_to_calendar_data(self, ics_url, index):
+        # Runs on the worker thread and works out the changes from the saved import index, calendar_store and the
+        # saved months are only used on the UI thread
+        started = time.perf_counter()
         try:
-            with open(settings_path) as file:
-                settings_dict = json.load(file)
-
-            # Fetch and parse
-            calendar_request = Calendar(requests.get(settings_dict['ics_url']).text)
-
-            if len(calendar_request.events) > 0:  # Remove all previously loaded uni tasks if link works
-                for month_key in list(calendar_data.keys()):
-                    for day_key in list(calendar_data[month_key].keys()):
-                        calendar_data[month_key][day_key] = [
-                            task for task in calendar_data[month_key][day_key]
-                            if task.get("type") != "uni"
-                        ]
-
-            for event in calendar_request.events:
-                request_date = event.begin.strftime("%d")
-                month_key = event.begin.strftime("%m-%Y")
-                start = event.begin.strftime("%H:%M")
-                end = event.end.strftime("%H:%M")
-
-                entry = {
-                    "text": event.name,
-                    "start_time": start,
-                    "end_time": end,
-                    "location": self.clean_location(event.location),
-                    "type": "uni"
-                }
-
-                calendar_data.setdefault(month_key, {}).setdefault(request_date, []).append(entry)
-            return True
+            # Fetch only if the feed changed, a 304 means the uni tasks in the saved data are already current
+            fetched_feed = fetch_feed(ics_url, self.user_data_dir)
+            fetched = time.perf_counter()
+            if fetched_feed is None:
+                result = (None, None, None, started, fetched, fetched)
+                Clock.schedule_once(lambda _dt: self.finish_import(ics_url, result))
+                return
+            feed_path, validators = fetched_feed
+
+            if index is None:
+                index = self.calendar.read_uid_index()
+            with open(feed_path, "rb") as feed:  # Read line by line, only events that differ from saved ones are kept
+                changes = diff_events(index, iter_vevents(feed))
+            parsed = time.perf_counter()
+
+            Clock.schedule_once(
+                lambda _dt: self.finish_import(ics_url, (changes, index, validators, started, fetched, parsed))
+            )
         except Exception as e:
+            clear_feed_cache(self.user_data_dir)  # Don't let a later 304 hide an import that never completed
             print(f"Failed to import: {e}")
-            return False
+            Clock.schedule_once(lambda _dt: self.finish_import(ics_url, None))
+
+    def finish_import(self, ics_url, result):  # On the UI thread once the worker is done, result is None if it failed
+        self.import_thread = None
+        if settings_dict.get("ics_url") != ics_url:  # The link was changed while this import ran, start over with it
+            if not self.start_background_import():
+                self.week_screen.set_sync_status("")  # The link was removed, there is nothing left to sync
+        elif result is None:
+            self.week_screen.set_sync_status("Timetable sync failed")
+        else:
+            self.apply_import(*result)
+
+    def apply_import(self, changes, index, validators, started, fetched, parsed):
+        if changes is None:
+            print(f"Timetable unchanged since last import (fetch {fetched - started:.2f}s)")
+            self.week_screen.set_sync_status(f"Timetable up to date ({fetched - started:.1f}s)")
+            return
 
-    def clean_location(self, location):
-        if not location:
-            return "No location"
+        if self.calendar.uid_index is None:
+            self.calendar.uid_index = index  # Read by the worker, kept up to date from here on
 
-        if location.strip() == "-":
-            return "(Online)"
+        try:
+            with self.calendar.pinned():  # Only months with changed tasks are read, none can be dropped meanwhile
+                delta = apply_changes(calendar_store.data, self.calendar.uid_index, changes)
+                for day in delta["days"]:  # Changed months stay in memory until saved
+                    self.calendar.mark_dirty(day)
+            for day in delta["days"]:  # Only the days the import changed are laid out and redrawn again
+                calendar_store.invalidate(day)
+        except Exception as e:
+            clear_feed_cache(self.user_data_dir)
+            print(f"Failed to import: {e}")
+            self.week_screen.set_sync_status("Timetable sync failed")
+            return
 
-        parts = location.split(".")
-        cleaned_location = f"{parts[0]} {parts[-1]}"
+        if (delta["added"] or delta["changed"] or delta["removed"]) and not self.save_data():
+            self.week_screen.set_sync_status("Timetable sync failed")
+            return  # The validators aren't saved, so the next launch downloads and imports this feed again
 
-        cleaned_location = re.sub(r"\([^)]*\)", "", cleaned_location)  # remove date ranges in brackets
+        try:
+            save_feed_validators(self.user_data_dir, validators)  # Later launches skip the download while unchanged
+        except OSError as e:
+            print(f"Failed to save feed cache: {e}")  # Only costs a full download next time
+        merged = time.perf_counter()
+
+        print(f"Timetable imported: {delta['added']} added, {delta['changed']} changed, {delta['removed']} removed "
+              f"(fetch {fetched - started:.2f}s, compare {parsed - fetched:.2f}s, merge {merged - parsed:.2f}s)")
+        self.week_screen.set_sync_status(
+            f"Timetable updated: +{delta['added']} ~{delta['changed']} -{delta['removed']} ({merged - started:.1f}s)"
+        )
 
-        return cleaned_location.strip().rstrip(",")
+    def show_overview(self, day):
+        self.overview_screen.show_from(as_date(day))
+        self.root.current = "overview"
 
     @staticmethod
     def show_message(message):  # A message is passed which is then displayed by kivy on screen
         toast(message)
 
 
-WeekTimetableApp().run()
+if __name__ == "__main__":
+    WeekTimetableApp().run()
@@ -0,0 +1,179 @@
+from functools import lru_cache
+
+from kivy.core.text import Label as CoreLabel
+from kivy.graphics import Color, InstructionGroup, Rectangle
+from kivy.metrics import dp, sp
+from kivy.properties import ColorProperty, NumericProperty
+from kivy.uix.widget import Widget
+
+
+@lru_cache(maxsize=1024)
+def text_texture(text, font_size, width, halign="center"):
+    # Labels are rendered once and reused, the same class names come back every week. Text is white so a Color
+    # instruction in front of the rectangle can tint it
+    label = CoreLabel(text=text, font_size=font_size, text_size=(width, None), halign=halign)
+    label.refresh()
+    return label.texture
+
+
+def draw_text(group, text, x, y, width, height, font_size, colour, halign="center", valign="middle"):
+    if not text or width < 1 or height < 1:
+        return
+    texture = text_texture(text, font_size, int(width), halign)
+    shown_height = min(texture.height, height)  # Text taller than its box is cut off at the bottom
+    region = texture.get_region(0, texture.height - shown_height, texture.width, shown_height)
+    top = y + height if valign == "top" else y + (height + shown_height) / 2
+    group.add(Color(*colour))
+    group.add(Rectangle(texture=region, pos=(x + (width - texture.width) / 2, top - shown_height), size=region.size))
+
+
+class WeekCanvas(Widget):  # Shared column geometry of the week widgets, a time column followed by seven day columns
+    time_column_width = NumericProperty(dp(90))
+    spacing = NumericProperty(dp(4))
+    cell_colour = ColorProperty((0.95, 0.95, 0.95, 1))
+    block_colour = ColorProperty((0.6, 0.75, 1, 1))
+    text_colour = ColorProperty((1, 1, 1, 1))
+    label_colour = ColorProperty((0, 0, 0, 0.54))
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.layout = None  # From week_layout.layout_week, nothing is drawn until a week is set
+        self.size_hint_y = None
+        self.bind(pos=self.redraw, size=self.redraw)
+
+    def column_pitch(self):
+        return max((self.width - self.time_column_width) / 7, 1)
+
+    def day_x(self, index):
+        return self.x + self.time_column_width + index * self.column_pitch()
+
+    def day_at(self, x):  # Index of the day column under x, or None over the time column
+        index = int((x - self.x - self.time_column_width) // self.column_pitch())
+        return index if 0 <= index < 7 and x >= self.x + self.time_column_width else None
+
+    def set_week(self, layout):
+        self.layout = layout
+        self.redraw()
+
+    def redraw(self, *_):
+        pass
+
+
+class WeekHeader(WeekCanvas):  # Day names and each day's untimed tasks, drawn above the scrolling grid
+    title_height = NumericProperty(dp(36))
+    untimed_height = NumericProperty(dp(60))
+    highlight_colour = ColorProperty((0.6, 0.75, 1, 1))
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.group = InstructionGroup()
+        self.canvas.add(self.group)
+        self.height = self.title_height + self.untimed_height
+
+    def redraw(self, *_):
+        group = self.group
+        group.clear()
+        if self.layout is None:
+            return
+
+        pitch = self.column_pitch()
+        untimed_top = self.top - self.title_height
+        draw_text(group, "Time", self.x, untimed_top, self.time_column_width, self.title_height, sp(15), (0, 0, 0, 1))
+        draw_text(group, "Untimed/All-Day", self.x, self.y, self.time_column_width, self.untimed_height, sp(13),
+                  self.label_colour)
+
+        for index, day in enumerate(self.layout["days"]):
+            x = self.day_x(index)
+            draw_text(group, day["title"], x, untimed_top, pitch, self.title_height, sp(15), (0, 0, 0, 1))
+
+            group.add(Color(*(self.highlight_colour if day["untimed"] else self.cell_colour)))
+            group.add(Rectangle(pos=(x, self.y), size=(pitch - self.spacing, self.untimed_height)))
+            text = "\n".join(f"• {task['text']}" for task in day["untimed"])
+            draw_text(group, text, x + dp(4), self.y + dp(4), pitch - self.spacing - dp(8),
+                      self.untimed_height - dp(8), sp(10), self.text_colour, valign="top")
+
+
+class WeekGrid(WeekCanvas):
+    # The week's time grid and task blocks drawn with canvas instructions, so changing week only replaces
+    # instructions instead of building a widget for every cell. Tapping a task dispatches on_task_press
+    slot_height = NumericProperty(dp(30))
+    __events__ = ("on_task_press",)
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.grid_group = InstructionGroup()  # Empty cells and time labels
+        self.day_groups = [InstructionGroup() for _ in range(7)]  # Task blocks, one group per day so a day redraws alone
+        self.hit_boxes = [[] for _ in range(7)]  # (x, y, width, height, task) of each block drawn in a day
+        self.canvas.add(self.grid_group)
+        for group in self.day_groups:
+            self.canvas.add(group)
+
+    def set_week(self, layout):
+        self.layout = layout
+        height = (layout["end_minute"] - layout["start_minute"]) / layout["slot_minutes"] * self.slot_height
+        if self.height != height:
+            self.height = height  # The size binding redraws
+        else:
+            self.redraw()
+
+    def minute_y(self, minute):  # Minutes run down from the top of the grid
+        return self.top - (minute - self.layout["start_minute"]) / self.layout["slot_minutes"] * self.slot_height
+
+    def redraw(self, *_):
+        group = self.grid_group
+        group.clear()
+        if self.layout is None:
+            return
+
+        layout = self.layout
+        cell_width = self.column_pitch() - self.spacing
+        group.add(Color(*self.cell_colour))
+        for minute in range(layout["start_minute"], layout["end_minute"], layout["slot_minutes"]):
+            y = self.minute_y(minute) - self.slot_height
+            for index in range(7):
+                group.add(Rectangle(pos=(self.day_x(index), y), size=(cell_width, self.slot_height - self.spacing)))
+
+        for minute, label in layout["time_labels"]:
+            draw_text(group, label, self.x, self.minute_y(minute) - self.slot_height, self.time_column_width,
+                      self.slot_height, sp(15), self.label_colour)
+
+        for index in range(7):
+            self.redraw_day(index)
+
+    def redraw_day(self, index):
+        group = self.day_groups[index]
+        group.clear()
+        hit_boxes = self.hit_boxes[index] = []
+        day = self.layout["days"][index]
+        cell_width = self.column_pitch() - self.spacing
+
+        for block in day["blocks"]:
+            x = self.day_x(index) + block["x"] * cell_width + dp(2)
+            width = block["width"] * cell_width - dp(4)
+            top = self.minute_y(block["start"]) - dp(2)
+            height = max(self.minute_y(block["start"]) - self.minute_y(block["end"]) - self.spacing - dp(2), dp(12))
+
+            group.add(Color(*self.block_colour))
+            group.add(Rectangle(pos=(x, top - height), size=(width, height)))
+            draw_text(group, block["label"], x + dp(2), top - height, width - dp(4), height, sp(9), self.text_colour)
+            hit_boxes.append((x, top - height, width, height, block["task"]))
+
+    def task_at(self, x, y):
+        index = self.day_at(x)
+        if index is None:
+            return None
+        for box_x, box_y, width, height, task in self.hit_boxes[index]:
+            if box_x <= x <= box_x + width and box_y <= y <= box_y + height:
+                return task
+        return None
+
+    def on_touch_down(self, touch):
+        if self.layout is not None and self.collide_point(*touch.pos):
+            task = self.task_at(*touch.pos)
+            if task is not None:
+                self.dispatch("on_task_press", task)
+                return True
+        return super().on_touch_down(touch)
+
+    def on_task_press(self, task):
+        pass
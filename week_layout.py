@@ -0,0 +1,107 @@
+from collections import OrderedDict
+from datetime import timedelta
+
+from calendar_store import as_date, format_minutes
+from interval_layout import column_spans, partition_intervals
+
+GRID_START_MINUTE = 8 * 60  # The week view shows 08:00 to 20:00 in 30 minute slots
+GRID_END_MINUTE = 20 * 60
+SLOT_MINUTES = 30
+CACHED_WEEKS = 5  # The visible week, the two either side of it and a couple visited before
+SUMMARY_LINES = 4  # Lines of tasks listed in a day of the month and term views
+
+
+def layout_day(store, day, start_minute=GRID_START_MINUTE, end_minute=GRID_END_MINUTE):
+    # Where each of a day's timed tasks goes in its column, clashing tasks share the column side by side.
+    # Blocks hold the task, its minutes clipped to the grid and its sub-column position as fractions of the day width
+    blocks = []
+    for task in store.timed_tasks(day):
+        start = max(task["start_minutes"], start_minute)
+        end = min(max(task["end_minutes"], task["start_minutes"] + 1), end_minute)  # Zero length tasks still show
+        if start >= end:
+            continue  # Outside the grid's hours
+        blocks.append({"task": task, "start": start, "end": end})
+
+    intervals = [(block["start"], block["end"]) for block in blocks]
+    columns, width = partition_intervals(intervals)
+    spans = column_spans(intervals, columns, width)
+    for block, column, span in zip(blocks, columns, spans):
+        block["x"] = column / width
+        block["width"] = span / width
+        block["label"] = f"{block['task']['text']}\n{block['task']['start_time']}-{block['task']['end_time']}"
+
+    return {
+        "date": as_date(day),
+        "title": day.strftime("%a\n%d %b"),
+        "untimed": store.untimed_tasks(day),
+        "blocks": blocks
+    }
+
+
+def day_summary(store, day, lines=SUMMARY_LINES):  # Short listing of a day's tasks for the month and term views
+    entries = [f"• {task['text']}" for task in store.untimed_tasks(day)]
+    entries += [f"{format_minutes(task['start_minutes'])} {task['text']}" for task in store.timed_tasks(day)]
+    if len(entries) > lines:
+        entries = entries[:lines - 1] + [f"+{len(entries) - lines + 1} more"]
+    return "\n".join(entries)
+
+
+def layout_week(store, monday, start_minute=GRID_START_MINUTE, end_minute=GRID_END_MINUTE, slot_minutes=SLOT_MINUTES):
+    # Everything the week view draws, worked out without touching any widgets
+    return {
+        "monday": as_date(monday),
+        "start_minute": start_minute,
+        "end_minute": end_minute,
+        "slot_minutes": slot_minutes,
+        "time_labels": [  # Only full hours are labelled
+            (minute, format_minutes(minute)) for minute in range(start_minute, end_minute, slot_minutes) if minute % 60 == 0
+        ],
+        "days": [layout_day(store, monday + timedelta(days=i), start_minute, end_minute) for i in range(7)]
+    }
+
+
+def monday_of(day):
+    day = as_date(day)
+    return day - timedelta(days=day.weekday())
+
+
+class WeekLayoutCache:  # Laid out weeks keyed by their Monday, least recently shown weeks are dropped first
+    def __init__(self, store, size=CACHED_WEEKS):
+        self.store = store
+        self.size = size
+        self.weeks = OrderedDict()
+
+    def get(self, day):  # Layout of the week containing day, built now if it isn't cached
+        monday = monday_of(day)
+        layout = self.weeks.get(monday)
+        if layout is None:
+            layout = self.weeks[monday] = layout_week(self.store, monday)
+            self.prune()
+        else:
+            self.weeks.move_to_end(monday)
+        return layout
+
+    def prefetch(self, day):  # Builds a week ahead of time, the visible week stays cached as long as size is 3 or more
+        monday = monday_of(day)
+        if monday not in self.weeks:
+            self.weeks[monday] = layout_week(self.store, monday)
+            self.prune()
+
+    def prune(self):
+        while len(self.weeks) > self.size:
+            self.weeks.popitem(last=False)
+
+    def update_day(self, day):  # Lays out a changed day again in place, weeks that aren't cached are built when shown
+        layout = self.weeks.get(monday_of(day))
+        if layout is not None:
+            day = as_date(day)
+            layout["days"][(day - layout["monday"]).days] = layout_day(
+                self.store, day, layout["start_minute"], layout["end_minute"]
+            )
+        return layout
+
+    def invalidate(self, day=None):  # Drop the week a changed day is in, or every week
+        if day is None:
+            self.weeks.clear()
+        else:
+            self.weeks.pop(monday_of(day), None)